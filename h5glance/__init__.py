@@ -1,4 +1,11 @@
 """Explore HDF5 files in an HTML view"""
-from .ipython import H5Glance, install_ipython_h5py_display
 
 __version__ = "0.9.0"
+
+def __getattr__(name):
+    # Importing h5glance.ipython loads h5py, so the command line tools don't
+    # until they need it.
+    if name in ('H5Glance', 'install_ipython_h5py_display'):
+        from . import ipython
+        return getattr(ipython, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
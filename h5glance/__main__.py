@@ -1,2 +1,2 @@
-from .terminal import main
+from .cli import main
 main()
@@ -0,0 +1,217 @@
+"""Merged view of sequence files which share the same structure
+
+Large datasets are often split across many files (e.g. European XFEL's
+``RAW-R0001-AGIPD00-S00000.h5``, ``...-S00001.h5``), each with the same
+hierarchy. This shows them as one tree, with the first dimension of datasets
+summed over the files.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import hashlib
+import os
+import re
+
+import h5py
+import h5py.h5o
+
+from .datatypes import fmt_dtype
+from .profiles import open_file
+from .terminal import print_tree
+from .utils import fmt_shape
+
+SEQUENCE_RE = re.compile(r'-S\d+(?=\.\w+$)')
+
+
+class FileStructure:
+    """The objects in one file, as (path, kind, detail, shape) tuples
+
+    kind is one of 'group', 'dataset', 'link' or 'hardlink'.
+    """
+    def __init__(self, filename, entries=None, error=None):
+        self.filename = filename
+        self.entries = entries or []
+        self.error = error
+
+    def fingerprint(self):
+        """A hash of the structure, ignoring the length of the first axis"""
+        if self.error is not None:
+            return None
+        h = hashlib.sha1()
+        for entry in self.entries:
+            h.update(repr(_structure_key(entry)).encode('utf-8'))
+        return h.hexdigest()
+
+
+def _structure_key(entry):
+    path, kind, detail, shape = entry
+    if shape:
+        shape = (len(shape),) + tuple(shape[1:])
+    return path, kind, detail, shape
+
+
+def _walk(group, prefix, entries, visited):
+    for key in group:
+        path = prefix + '/' + key
+        link = group.get(key, getlink=True)
+        if isinstance(link, h5py.SoftLink):
+            entries.append((path, 'link', link.path, None))
+            continue
+        elif isinstance(link, h5py.ExternalLink):
+            # Sequence files may link to different files, so only the path
+            # inside the target is part of the structure.
+            entries.append((path, 'link', '<external>/' + link.path.lstrip('/'),
+                            None))
+            continue
+
+        obj = group[key]
+        addr = h5py.h5o.get_info(obj.id).addr
+        if addr in visited:
+            entries.append((path, 'hardlink', visited[addr], None))
+            continue
+        visited[addr] = path
+
+        if isinstance(obj, h5py.Dataset):
+            entries.append((path, 'dataset', fmt_dtype(obj.id.get_type()),
+                            obj.shape))
+        elif isinstance(obj, h5py.Group):
+            entries.append((path, 'group', None, None))
+            _walk(obj, path, entries, visited)
+
+
+def file_structure(filename, path=None):
+    """Read the structure of one file (or one group inside it)"""
+    try:
+        with open_file(filename) as f:
+            grp = f[path] if path else f
+            entries = []
+            _walk(grp, '', entries, {})
+            return FileStructure(filename, entries)
+    except Exception as e:
+        return FileStructure(filename, error=str(e) or type(e).__name__)
+
+
+def find_files(pattern):
+    """Expand a directory or a glob pattern to a sorted list of HDF5 files"""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.h5')
+    return sorted(p for p in glob.glob(pattern) if os.path.isfile(p))
+
+
+def read_structures(filenames, path=None, jobs=None):
+    """Read the structures of several files in parallel"""
+    if jobs == 1 or len(filenames) < 2:
+        return [file_structure(fn, path) for fn in filenames]
+    jobs = jobs or os.cpu_count() or 1
+    chunksize = max(1, len(filenames) // (4 * jobs))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(file_structure, filenames,
+                             [path] * len(filenames), chunksize=chunksize))
+
+
+def sequence_name(filename):
+    """The name shared by all files in a sequence, e.g. RAW-R0001-DA01-S*.h5"""
+    return SEQUENCE_RE.sub('-S*', os.path.basename(filename))
+
+
+class SequenceSet:
+    """Files from one sequence, split into common structure and outliers"""
+    def __init__(self, name, structures):
+        self.name = name
+        by_fp = {}
+        for s in structures:
+            by_fp.setdefault(s.fingerprint(), []).append(s)
+        readable = {fp: l for fp, l in by_fp.items() if fp is not None}
+        if readable:
+            common_fp = max(readable, key=lambda fp: len(readable[fp]))
+        else:
+            common_fp = None
+        self.common = readable.get(common_fp, [])
+        self.outliers = [s for fp, l in by_fp.items() if fp != common_fp
+                         for s in l]
+
+    def merged_entries(self):
+        """Entries of the common structure, with first dimensions summed"""
+        if not self.common:
+            return []
+        res = []
+        for entry_set in zip(*[s.entries for s in self.common]):
+            path, kind, detail, shape = entry_set[0]
+            if kind == 'dataset' and shape:
+                total = sum(e[3][0] for e in entry_set)
+                shape = (total,) + tuple(shape[1:])
+            res.append((path, kind, detail, shape))
+        return res
+
+
+def group_sequences(structures):
+    sets = {}
+    for s in structures:
+        sets.setdefault(sequence_name(s.filename), []).append(s)
+    return [SequenceSet(name, l) for name, l in sets.items()]
+
+
+def fmt_summed_shape(shape, nfiles):
+    if not shape or nfiles < 2:
+        return fmt_shape(shape)
+    s = '{} (Σ over {} files)'.format(shape[0], nfiles)
+    return ' × '.join([s] + [fmt_shape((n,)) for n in shape[1:]])
+
+
+def merged_tree(seqset, colors, root):
+    """Build a tree (as for print_tree) of a sequence set's common structure"""
+    nfiles = len(seqset.common)
+    top = (root, [])
+    nodes = {'': top}
+    for path, kind, detail, shape in seqset.merged_entries():
+        parent, _, name = path.rpartition('/')
+        if kind == 'group':
+            node = (colors.group + name + colors.reset, [])
+            nodes[path] = node
+        elif kind == 'dataset':
+            node = (colors.dataset + name + colors.reset + '\t[{}: {}]'.format(
+                detail, fmt_summed_shape(shape, nfiles)), [])
+        elif kind == 'hardlink':
+            node = (name + '\t= ' + detail, [])
+        else:
+            node = (colors.link + name + colors.reset + '\t-> ' + detail, [])
+        nodes[parent][1].append(node)
+    return top
+
+
+def fmt_differences(structure, reference):
+    """Describe how one file's structure differs from the common one"""
+    if structure.error:
+        return 'unreadable: ' + structure.error
+    if reference is None:
+        return 'no common structure'
+    ref = {e[0]: e for e in reference.entries}
+    this = {e[0]: e for e in structure.entries}
+    missing = [p for p in ref if p not in this]
+    extra = [p for p in this if p not in ref]
+    changed = [p for p in this if p in ref and
+               _structure_key(this[p]) != _structure_key(ref[p])]
+    parts = []
+    for label, paths in [('missing', missing), ('extra', extra),
+                         ('different', changed)]:
+        if paths:
+            shown = ', '.join(paths[:3]) + (', …' if len(paths) > 3 else '')
+            parts.append('{} {}: {}'.format(len(paths), label, shown))
+    return '; '.join(parts)
+
+
+def print_aggregate(structures, colors, file=None):
+    """Print merged trees for sequences, flagging files that don't match"""
+    for seqset in group_sequences(structures):
+        nfiles = len(seqset.common)
+        root = '{} ({} files)'.format(seqset.name, nfiles)
+        print_tree(merged_tree(seqset, colors, root), file=file)
+
+        if seqset.outliers:
+            reference = seqset.common[0] if seqset.common else None
+            print('\n! {} files do not match the common structure:'
+                  .format(len(seqset.outliers)), file=file)
+            for s in seqset.outliers:
+                print('  {}: {}'.format(os.path.basename(s.filename),
+                                        fmt_differences(s, reference)),
+                      file=file)
+        print(file=file)
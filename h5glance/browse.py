@@ -0,0 +1,358 @@
+"""Full-screen interactive browser for HDF5 files in the terminal
+
+A group's members are only listed when it's first expanded, and only the
+rows on screen are drawn, so even huge files open instantly.
+
+Keys: arrows (or hjkl) to move, expand & collapse; Enter toggles a group;
+PgUp/PgDn/Home/End; / to search object names & n for the next match; q
+to quit.
+"""
+import io
+import sys
+
+import h5py
+import h5py.h5o
+
+from .datatypes import fmt_dtype
+from .terminal import fmt_attr, print_dataset_info
+from .utils import fmt_shape
+
+
+class Row:
+    """One object in the tree, shown on a line when its parents are expanded"""
+    def __init__(self, path, name, depth, kind, target=None):
+        self.path = path
+        self.name = name
+        self.depth = depth
+        self.kind = kind        # 'group', 'dataset', 'datatype' or 'link'
+        self.target = target    # For soft & external links
+        self.expanded = False
+        self._label = None
+
+    @property
+    def expandable(self):
+        return self.kind == 'group'
+
+
+def _join(path, key):
+    return path.rstrip('/') + '/' + key
+
+
+class TreeModel:
+    """The state of the browser, kept separate from the curses drawing
+
+    ``rows`` holds only the rows which are currently visible.
+    """
+    def __init__(self, file: h5py.File):
+        self.file = file
+        self._children = {}  # Group path -> list of Rows, loaded on demand
+        self._details = {}
+        root = Row('/', file.filename, 0, 'group')
+        self.rows = [root]
+        self.expand(0)
+
+    def children(self, path):
+        """Rows for the members of a group, loaded the first time it's needed"""
+        if path not in self._children:
+            grp = self.file[path]
+            depth = path.count('/') if path != '/' else 0
+            rows = []
+            for key in grp:
+                rows.append(self._make_row(grp, key, _join(path, key), depth + 1))
+            self._children[path] = rows
+        return self._children[path]
+
+    @staticmethod
+    def _make_row(grp, key, path, depth):
+        link = grp.get(key, getlink=True)
+        if isinstance(link, h5py.SoftLink):
+            return Row(path, key, depth, 'link', link.path)
+        elif isinstance(link, h5py.ExternalLink):
+            return Row(path, key, depth, 'link',
+                       '{}/{}'.format(link.filename, link.path))
+        cls = grp.get(key, getclass=True)
+        kind = {h5py.Group: 'group', h5py.Dataset: 'dataset'}.get(cls, 'datatype')
+        return Row(path, key, depth, kind)
+
+    def label(self, row):
+        """The text for a row in the tree; computed only when it's drawn"""
+        if row._label is None:
+            if row.kind == 'link':
+                row._label = '{}  -> {}'.format(row.name, row.target)
+            elif row.kind == 'dataset':
+                ds = self.file[row.path]
+                row._label = '{}  [{}: {}]'.format(
+                    row.name, fmt_dtype(ds.id.get_type()), fmt_shape(ds.shape))
+            else:
+                row._label = row.name
+        return row._label
+
+    def expand(self, i):
+        row = self.rows[i]
+        if not row.expandable or row.expanded:
+            return
+        row.expanded = True
+        for child in self.children(row.path):
+            child.expanded = False
+        self.rows[i + 1:i + 1] = self.children(row.path)
+
+    def collapse(self, i):
+        row = self.rows[i]
+        if not row.expanded:
+            return
+        row.expanded = False
+        end = i + 1
+        while end < len(self.rows) and self.rows[end].depth > row.depth:
+            end += 1
+        del self.rows[i + 1:end]
+
+    def toggle(self, i):
+        if self.rows[i].expanded:
+            self.collapse(i)
+        else:
+            self.expand(i)
+
+    def parent_index(self, i):
+        depth = self.rows[i].depth
+        for j in range(i - 1, -1, -1):
+            if self.rows[j].depth < depth:
+                return j
+        return i
+
+    def details(self, i):
+        """Text describing the object at row i, for the details pane"""
+        row = self.rows[i]
+        if row.path not in self._details:
+            sio = io.StringIO()
+            print(row.path, file=sio)
+            if row.kind == 'link':
+                print('link to:', row.target, file=sio)
+            elif row.kind == 'dataset':
+                print_dataset_info(self.file[row.path], file=sio, preview=False)
+            else:
+                obj = self.file[row.path]
+                if row.kind == 'group':
+                    print('{} members'.format(len(obj)), file=sio)
+                print('\n{} attributes:'.format(len(obj.attrs)), file=sio)
+                for k in obj.attrs:
+                    print('* ', k, ': ', fmt_attr(k, obj.attrs), sep='',
+                          file=sio)
+            self._details[row.path] = sio.getvalue()
+        return self._details[row.path]
+
+    def find(self, text, start=0):
+        """Find the next object after row *start* with *text* in its name
+
+        Groups are searched in display order, listing their members as
+        needed. The matching row is revealed by expanding its parents.
+        Returns the row index, or None if there's no match.
+        """
+        text = text.lower()
+        current = self.rows[start].path
+        after, wrapped = False, None
+        for p in self._iter_paths():
+            if p == current and not after:
+                after = True
+            elif text in p.rpartition('/')[2].lower():
+                if after:
+                    return self.reveal(p)
+                elif wrapped is None:
+                    wrapped = p
+        return None if wrapped is None else self.reveal(wrapped)
+
+    def _iter_paths(self):
+        # Depth first, in display order, without following links to groups
+        # we've already been through (which could otherwise loop forever)
+        seen = set()
+        stack = [Row('/', '', 0, 'group')]
+        while stack:
+            row = stack.pop()
+            yield row.path
+            if row.kind != 'group':
+                continue
+            addr = h5py.h5o.get_info(self.file[row.path].id).addr
+            if addr in seen:
+                continue
+            seen.add(addr)
+            stack.extend(reversed(self.children(row.path)))
+
+    def resolve(self, path):
+        """The row path for an object, following soft links to groups
+
+        Raises KeyError if there's no such object.
+        """
+        parts = [p for p in path.split('/') if p]
+        current = '/'
+        n_links = 0
+        while parts:
+            grp = self.file[current]
+            part = parts.pop(0)
+            link = grp.get(part, getlink=True) if isinstance(grp, h5py.Group) \
+                else None
+            if link is None or (isinstance(link, h5py.ExternalLink) and parts):
+                raise KeyError("No object {!r} in the file".format(path))
+            if isinstance(link, h5py.SoftLink) and parts:
+                n_links += 1
+                if n_links > 100:
+                    raise KeyError("Too many soft links in {!r}".format(path))
+                if link.path.startswith('/'):
+                    current = '/'
+                parts = [p for p in link.path.split('/') if p] + parts
+                continue
+            current = _join(current, part)
+        return current
+
+    def reveal(self, path):
+        """Expand the groups containing *path*, returning its row index"""
+        i = 0
+        parts = [p for p in path.split('/') if p]
+        for depth in range(1, len(parts) + 1):
+            self.expand(i)
+            target = '/' + '/'.join(parts[:depth])
+            j = i + 1
+            while self.rows[j].path != target:
+                j += 1
+            i = j
+        return i
+
+
+class Browser:
+    """Draw a TreeModel with curses and handle keys"""
+    def __init__(self, screen, model):
+        import curses
+        self.curses = curses
+        self.screen = screen
+        self.model = model
+        self.cursor = 0
+        self.top = 0
+        self.search = ''
+        self.message = ''
+        curses.curs_set(0)
+        self.attrs = {'group': curses.A_NORMAL, 'dataset': curses.A_BOLD,
+                      'link': curses.A_NORMAL, 'datatype': curses.A_NORMAL}
+        if curses.has_colors():
+            curses.use_default_colors()
+            curses.init_pair(1, curses.COLOR_BLUE, -1)
+            curses.init_pair(2, curses.COLOR_MAGENTA, -1)
+            self.attrs['group'] = curses.color_pair(1) | curses.A_BOLD
+            self.attrs['link'] = curses.color_pair(2)
+
+    def _put(self, y, x, text, width, attr=0):
+        try:
+            self.screen.addnstr(y, x, text.replace('\t', ' '), max(width, 0), attr)
+        except self.curses.error:
+            pass  # Writing the bottom right corner raises an error
+
+    def draw(self):
+        scr = self.screen
+        scr.erase()
+        height, width = scr.getmaxyx()
+        tree_h = height - 1
+        tree_w = max(width // 2, min(width, 30))
+        if self.cursor < self.top:
+            self.top = self.cursor
+        elif self.cursor >= self.top + tree_h:
+            self.top = self.cursor - tree_h + 1
+
+        rows = self.model.rows
+        for y, i in enumerate(range(self.top, min(len(rows), self.top + tree_h))):
+            row = rows[i]
+            marker = ('▾ ' if row.expanded else '▸ ') if row.expandable else '  '
+            text = '  ' * row.depth + marker + self.model.label(row)
+            attr = self.attrs[row.kind]
+            if i == self.cursor:
+                attr |= self.curses.A_REVERSE
+            self._put(y, 0, text.ljust(tree_w - 1), tree_w - 1, attr)
+
+        try:
+            details = self.model.details(self.cursor)
+        except Exception as e:
+            details = 'Error reading details: {}'.format(e)
+        for y, line in enumerate(details.splitlines()[:tree_h]):
+            self._put(y, tree_w + 1, line, width - tree_w - 1)
+
+        status = self.message or '{}/{}  arrows: move/expand  /: search  q: quit'\
+            .format(self.cursor + 1, len(rows))
+        self._put(height - 1, 0, status, width - 1, self.curses.A_DIM)
+        scr.refresh()
+
+    def prompt(self, text):
+        height, width = self.screen.getmaxyx()
+        self.curses.curs_set(1)
+        self.curses.echo()
+        self._put(height - 1, 0, text.ljust(width - 1), width - 1)
+        try:
+            res = self.screen.getstr(height - 1, len(text)).decode('utf-8', 'replace')
+        finally:
+            self.curses.noecho()
+            self.curses.curs_set(0)
+        return res
+
+    def do_search(self):
+        if not self.search:
+            return
+        i = self.model.find(self.search, self.cursor)
+        if i is None:
+            self.message = 'Not found: {}'.format(self.search)
+        else:
+            self.cursor = i
+
+    def run(self):
+        c = self.curses
+        while True:
+            self.draw()
+            key = self.screen.getch()
+            self.message = ''
+            rows = self.model.rows
+            page = max(self.screen.getmaxyx()[0] - 2, 1)
+            if key == ord('q'):
+                return
+            elif key in (c.KEY_DOWN, ord('j')):
+                self.cursor = min(self.cursor + 1, len(rows) - 1)
+            elif key in (c.KEY_UP, ord('k')):
+                self.cursor = max(self.cursor - 1, 0)
+            elif key == c.KEY_NPAGE:
+                self.cursor = min(self.cursor + page, len(rows) - 1)
+            elif key == c.KEY_PPAGE:
+                self.cursor = max(self.cursor - page, 0)
+            elif key == c.KEY_HOME:
+                self.cursor = 0
+            elif key == c.KEY_END:
+                self.cursor = len(rows) - 1
+            elif key in (c.KEY_RIGHT, ord('l')):
+                row = rows[self.cursor]
+                if row.expanded and self.cursor + 1 < len(rows):
+                    self.cursor += 1
+                else:
+                    self.model.expand(self.cursor)
+            elif key in (c.KEY_LEFT, ord('h')):
+                if rows[self.cursor].expanded:
+                    self.model.collapse(self.cursor)
+                else:
+                    self.cursor = self.model.parent_index(self.cursor)
+            elif key in (c.KEY_ENTER, 10, 13, ord(' ')):
+                self.model.toggle(self.cursor)
+            elif key == ord('/'):
+                self.search = self.prompt('/')
+                self.do_search()
+            elif key == ord('n'):
+                self.do_search()
+
+
+def browse(file: h5py.File, path=None):
+    """Run the interactive browser until the user quits"""
+    import curses
+    model = TreeModel(file)
+    if path:
+        try:
+            target = model.resolve(path)
+        except KeyError as e:
+            sys.exit(e.args[0])
+
+    def main(screen):
+        browser = Browser(screen, model)
+        if path:
+            browser.cursor = model.reveal(target)
+        browser.run()
+
+    curses.wrapper(main)
@@ -0,0 +1,162 @@
+"""Command line entry points
+
+Parsing arguments only needs the standard library, so ``--help`` and
+``--version`` answer quickly. h5py, numpy & the rest of h5glance are
+imported once we know what the command will do.
+"""
+import argparse
+from pathlib import Path
+import sys
+
+from .paths import path_or_url
+
+
+def make_parser():
+    from . import __version__
+    ap = argparse.ArgumentParser(prog="h5glance",
+             description="View HDF5 file structure in the terminal")
+    ap.add_argument("file", type=path_or_url,
+                    help="HDF5 file to view, or an http(s) URL to read it from")
+    ap.add_argument("path", nargs='?',
+        help="Object to show within the file, or '-' to prompt for a name"
+    )
+    ap.add_argument('--attrs', action='store_true',
+        help="Show attributes of groups",
+    )
+    ap.add_argument('--pager', action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Use a pager to display output if it is too long (default: on)",
+    )
+    ap.add_argument('-d', '--depth', default=float('inf'), type=float,
+        help='Show group children only up to a certain depth, all by default.')
+    ap.add_argument('-b', '--browse', action='store_true',
+        help="Explore the file interactively in a full-screen view",
+    )
+    ap.add_argument('--max-children', metavar='N', type=int,
+        help="Show only the first & last members of groups with more than N "
+             "members",
+    )
+    ap.add_argument('--follow-external', action='store_true',
+        help="Show the contents of external links to other files",
+    )
+    ap.add_argument('-s', '--slice',
+        help="Select part of a dataset to examine, using Python slicing and "
+             "indexing as for a numpy array, e.g. 0,100:110",
+    )
+    ap.add_argument('--preview', action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Show sparklines summarising a sample of a dataset's values "
+             "(default: on)",
+    )
+    ap.add_argument('--save', metavar='OUT_FILE', type=Path,
+        help="Save a dataset (or the part selected with --slice) to a .npy "
+             "or raw binary (.raw/.bin) file",
+    )
+    ap.add_argument('--verify', action='store_true',
+        help="Check that every chunk of data in the file (or under the given "
+             "path) can be read and decoded",
+    )
+    ap.add_argument('--try-compression', action='store_true',
+        help="Estimate the size & speed of a dataset with other compression "
+             "filters, by compressing a sample of its chunks",
+    )
+    ap.add_argument('--compare-data', action='store_true',
+        help="Compare the data in two files, chunk by chunk: "
+             "h5glance --compare-data A.h5 B.h5 [PATH]",
+    )
+    ap.add_argument('-j', '--jobs', type=int,
+        help="Number of worker processes to use (default: number of CPUs, "
+             "but showing a file's tree uses one process unless this is set)",
+    )
+    ap.add_argument('--aggregate', action='store_true',
+        help="Show one merged tree for sequence files with the same structure. "
+             "FILE is then a directory or a glob pattern, e.g. 'r0001/*.h5'.",
+    )
+    open_opts = ap.add_argument_group(
+        "file access",
+        "Settings for opening files, e.g. for network filesystems. These can "
+        "also be set in the H5GLANCE_OPEN environment variable or the [open] "
+        "section of ~/.config/h5glance/config.ini."
+    )
+    open_opts.add_argument('--open-profile', metavar='NAME',
+        help="Named set of file access settings: 'default', 'network', 'core' "
+             "(read whole file to memory), or defined in the config file",
+    )
+    open_opts.add_argument('--rdcc-nbytes', metavar='SIZE',
+        help="Size of the chunk cache for each dataset, e.g. 64M")
+    open_opts.add_argument('--rdcc-nslots', metavar='N',
+        help="Number of slots in the chunk cache hash table")
+    open_opts.add_argument('--page-buf-size', metavar='SIZE',
+        help="Page buffer size, for files created with paged aggregation")
+    open_opts.add_argument('--mdc-size', metavar='SIZE',
+        help="Initial size of the metadata cache")
+    open_opts.add_argument('--benchmark-open', action='store_true',
+        help="Time inspecting the file with each profile & show the fastest")
+    ap.add_argument('--version', action='version',
+                    version='h5glance {}'.format(__version__))
+
+    return ap
+
+
+def make_compare_parser():
+    ap = argparse.ArgumentParser(prog="h5glance --compare-data",
+             description="Compare the data in two HDF5 files")
+    ap.add_argument("file_a", type=path_or_url, help="First HDF5 file")
+    ap.add_argument("file_b", type=path_or_url, help="Second HDF5 file")
+    ap.add_argument("path", nargs='?',
+        help="Group or dataset to compare in both files (default: everything)"
+    )
+    ap.add_argument('-j', '--jobs', type=int,
+        help="Number of worker processes to use (default: number of CPUs)",
+    )
+    return ap
+
+
+def main(argv=None):
+    """Entry point for the h5glance command"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if '--compare-data' in argv:
+        # Two files instead of one, so this has its own parser
+        argv = [a for a in argv if a != '--compare-data']
+        args = make_compare_parser().parse_args(argv)
+        from .compare import run
+        return run(args)
+
+    args = make_parser().parse_args(argv)
+    from .terminal import run
+    return run(args)
+
+
+def make_html_parser():
+    from . import __version__
+    ap = argparse.ArgumentParser(prog="h5glance-html",
+                                 description="View HDF5 file structure in HTML")
+    ap.add_argument("input", type=path_or_url,
+                    help="HDF5 file to view, a directory to browse files in, "
+                         "or an http(s) URL to read a file from")
+    ap.add_argument("-w", "--write", metavar="HTML_FILE",
+                    help="Write output to HTML file.")
+    ap.add_argument("--thumbnails", action="store_true",
+                    help="Show small images of 2D & 3D datasets.")
+    ap.add_argument("--max-children", metavar="N", type=int,
+                    help="Show only the first & last members of groups with "
+                         "more than N members. When serving, the rest can be "
+                         "viewed N at a time.")
+    ap.add_argument("--follow-external", action="store_true",
+                    help="Show the contents of external links to other files.")
+    ap.add_argument("--host", default="localhost",
+                    help="Interface to serve on, e.g. 0.0.0.0 to allow other "
+                         "machines to connect (default: localhost).")
+    ap.add_argument("--port", type=int, default=0,
+                    help="Port to serve on (default: a free port).")
+    ap.add_argument('--version', action='version',
+                    version='h5glance-html {}'.format(__version__))
+    return ap
+
+
+def html_main(argv=None):
+    """Entry point for the h5glance-html command"""
+    args = make_html_parser().parse_args(argv)
+    from .html_cli import run
+    return run(args)
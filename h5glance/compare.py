@@ -0,0 +1,299 @@
+"""Compare the data in two HDF5 files, chunk by chunk
+
+Datasets with the same path in both files are compared. Where they have
+the same chunk shape & filters, each pair of chunks is first compared as
+raw (usually compressed) bytes, and only decoded if those differ. Other
+datasets are read in blocks aligned to their storage. Worker processes
+handle one chunk at a time, so memory use stays bounded however big the
+datasets are.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import math
+import sys
+import time
+
+import h5py
+import numpy
+
+from . import pool
+from .mapped import read
+from .profiles import open_file
+from .sampling import chunk_grid, chunk_selection, storage_chunks
+from .utils import ProgressBar, fmt_bytes
+
+# Record the positions of at most this many differing chunks per dataset
+MAX_OFFSETS = 20
+
+
+class Task(pool.Task):
+    """A range of chunks (in C order) of one dataset to compare"""
+    def __init__(self, path, start, stop, nbytes=0, raw=False):
+        super().__init__(path, start, stop, nbytes)
+        self.raw = raw      # Try comparing raw chunk bytes first
+
+
+class DatasetDiff:
+    """Differences found in one dataset, or part of it"""
+    def __init__(self, path):
+        self.path = path
+        self.nchunks = 0
+        self.nraw = 0            # Chunks found equal without decoding
+        self.ndiff_chunks = 0
+        self.ndiff_values = 0
+        self.max_abs = 0.
+        self.max_rel = 0.
+        self.offsets = []        # First few differing chunks
+
+    def add_chunk(self, offset, ndiff, max_abs, max_rel):
+        self.nchunks += 1
+        if not ndiff:
+            return
+        self.ndiff_chunks += 1
+        self.ndiff_values += ndiff
+        self.max_abs = numpy.fmax(self.max_abs, max_abs)
+        self.max_rel = numpy.fmax(self.max_rel, max_rel)
+        if len(self.offsets) < MAX_OFFSETS:
+            self.offsets.append(offset)
+
+    def add(self, other):
+        self.nchunks += other.nchunks
+        self.nraw += other.nraw
+        self.ndiff_chunks += other.ndiff_chunks
+        self.ndiff_values += other.ndiff_values
+        self.max_abs = numpy.fmax(self.max_abs, other.max_abs)
+        self.max_rel = numpy.fmax(self.max_rel, other.max_rel)
+        self.offsets = sorted(self.offsets + other.offsets)[:MAX_OFFSETS]
+
+
+def filters(ds):
+    dcpl = ds.id.get_create_plist()
+    return [dcpl.get_filter(i) for i in range(dcpl.get_nfilters())]
+
+
+def can_compare_raw(a, b):
+    """Chunks can be compared as stored if they're encoded the same way"""
+    return (a.chunks is not None and a.chunks == b.chunks
+            and a.id.get_type() == b.id.get_type()
+            and filters(a) == filters(b))
+
+
+def check_pair(a, b):
+    """Return a reason the datasets can't be compared, or None"""
+    if not isinstance(b, h5py.Dataset):
+        return 'not a dataset in the second file'
+    if a.shape != b.shape:
+        return 'shapes differ: {} vs {}'.format(a.shape, b.shape)
+    if a.dtype != b.dtype:
+        return 'types differ: {} vs {}'.format(a.dtype, b.dtype)
+    return None
+
+
+def dataset_tasks(a, b):
+    """Split comparing a pair of datasets into tasks"""
+    if a.shape is None or a.size == 0:
+        return []
+    n = math.prod(chunk_grid(a.shape, storage_chunks(a)))
+    nbytes = a.size * a.dtype.itemsize
+    raw = can_compare_raw(a, b)
+    return [Task(a.name, s, e, nb, raw) for s, e, nb in pool.split(n, nbytes)]
+
+
+def _datasets(grp):
+    if isinstance(grp, h5py.Dataset):
+        return {grp.name: grp}
+    found = {}
+    def visit(name, obj):
+        if isinstance(obj, h5py.Dataset):
+            found[obj.name] = obj
+    grp.visititems(visit)
+    return found
+
+
+def collect_tasks(file_a, file_b, path=None):
+    """Pair up the datasets in two files & make tasks to compare them
+
+    Returns (tasks, problems), where problems lists (path, message) for
+    datasets which can't be compared.
+    """
+    with open_file(file_a) as fa, open_file(file_b) as fb:
+        in_a = _datasets(fa[path] if path else fa)
+        if not path:
+            in_b = _datasets(fb)
+        else:
+            in_b = _datasets(fb[path]) if path in fb else {}
+        tasks, problems = [], []
+        for p, a in sorted(in_a.items()):
+            b = fb.get(p)
+            if b is None:
+                problems.append((p, 'only in the first file'))
+                continue
+            reason = check_pair(a, b)
+            if reason:
+                problems.append((p, reason))
+            else:
+                tasks.extend(dataset_tasks(a, b))
+        for p in sorted(in_b):
+            other = fa.get(p)
+            if other is None:
+                problems.append((p, 'only in the second file'))
+            elif not isinstance(other, h5py.Dataset):
+                problems.append((p, 'not a dataset in the first file'))
+    return tasks, problems
+
+
+def diff_arrays(x, y):
+    """Compare two arrays, returning (n differing, max abs diff, max rel diff)
+
+    NaNs in the same places count as equal. The differences are 0 for
+    types which aren't numbers.
+    """
+    if x.dtype.kind in 'fc':
+        differ = ~((x == y) | (numpy.isnan(x) & numpy.isnan(y)))
+    else:
+        differ = numpy.asarray(x != y)
+    ndiff = int(numpy.count_nonzero(differ))
+    if not ndiff or x.dtype.kind not in 'biufc':
+        return ndiff, 0., 0.
+    xd, yd = x[differ], y[differ]
+    if x.dtype.kind in 'biu':
+        xd, yd = xd.astype(numpy.float64), yd.astype(numpy.float64)
+    with numpy.errstate(all='ignore'):
+        d = numpy.abs(xd - yd)
+        scale = numpy.maximum(numpy.abs(xd), numpy.abs(yd))
+        rel = d / scale
+    return ndiff, float(numpy.fmax.reduce(d)), float(numpy.fmax.reduce(rel))
+
+
+def _raw_chunk(ds, offset):
+    # (filter mask, bytes) for a stored chunk, or None if not allocated
+    try:
+        return ds.id.read_direct_chunk(offset)
+    except Exception:
+        return None
+
+
+def compare_task(file_a, file_b, task):
+    """Compare one range of chunks in a worker process"""
+    return compare_chunks(pool.worker_file(file_a), pool.worker_file(file_b),
+                          task)
+
+
+def compare_chunks(fa, fb, task):
+    """Compare one range of chunks in open files, returning a DatasetDiff"""
+    a, b = fa[task.path], fb[task.path]
+    chunks = storage_chunks(a)
+    grid = chunk_grid(a.shape, chunks)
+    res = DatasetDiff(task.path)
+    for i in range(task.start, task.stop):
+        sel = chunk_selection(numpy.unravel_index(i, grid), a.shape, chunks)
+        offset = tuple(int(s.start) for s in sel)
+        if task.raw:
+            raw_a = _raw_chunk(a, offset)
+            if raw_a is not None and raw_a == _raw_chunk(b, offset):
+                res.nraw += 1
+                res.add_chunk(offset, 0, 0., 0.)
+                continue
+        res.add_chunk(offset, *diff_arrays(read(a, sel), read(b, sel)))
+    return res
+
+
+class CompareResult:
+    def __init__(self, datasets, nbytes, problems, seconds):
+        self.datasets = datasets    # List of DatasetDiff
+        self.nbytes = nbytes
+        self.problems = problems    # List of (path, message)
+        self.seconds = seconds
+
+    @property
+    def differs(self):
+        return bool(self.problems) or any(d.ndiff_chunks for d in self.datasets)
+
+
+def compare_files(file_a, file_b, path=None, jobs=None, progress=True):
+    """Compare the datasets in two files (or under *path* in both)"""
+    t0 = time.perf_counter()
+    tasks, problems = collect_tasks(file_a, file_b, path)
+    total = sum(t.nbytes for t in tasks)
+    bar = ProgressBar(total, label='Comparing ') if progress else None
+    diffs = {}
+
+    def add(task, res):
+        diffs.setdefault(task.path, DatasetDiff(task.path)).add(res)
+        if bar:
+            bar.update(task.nbytes)
+
+    def add_error(task, e):
+        problems.append((task.path, str(e) or type(e).__name__))
+        if bar:
+            bar.update(task.nbytes)
+
+    if jobs == 1:
+        with open_file(file_a) as fa, open_file(file_b) as fb:
+            for task in tasks:
+                try:
+                    add(task, compare_chunks(fa, fb, task))
+                except Exception as e:
+                    add_error(task, e)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futs = [(t, executor.submit(compare_task, str(file_a),
+                                        str(file_b), t))
+                    for t in tasks]
+            for task, fut in futs:
+                try:
+                    add(task, fut.result())
+                except Exception as e:
+                    add_error(task, e)
+    if bar:
+        bar.close()
+
+    problems.sort()
+    return CompareResult(list(diffs.values()), total, problems,
+                         time.perf_counter() - t0)
+
+
+def print_comparison(result, file=None):
+    nchunks = sum(d.nchunks for d in result.datasets)
+    nraw = sum(d.nraw for d in result.datasets)
+    ndiffer = sum(1 for d in result.datasets if d.ndiff_chunks)
+    print("Compared {} datasets ({}) in {:.1f} s".format(
+        len(result.datasets), fmt_bytes(result.nbytes), result.seconds),
+        file=file)
+    print("{} of {} chunks matched without decoding".format(nraw, nchunks),
+          file=file)
+    if not result.differs:
+        print("All datasets are identical", file=file)
+        return
+    print("{} datasets differ".format(ndiffer), file=file)
+
+    for d in result.datasets:
+        if not d.ndiff_chunks:
+            continue
+        print("{}: {} of {} chunks differ ({} values); max abs diff {:.6g}, "
+              "max rel diff {:.6g}".format(
+                  d.path, d.ndiff_chunks, d.nchunks, d.ndiff_values,
+                  d.max_abs, d.max_rel), file=file)
+        more = d.ndiff_chunks - len(d.offsets)
+        print("  chunks at: " + ', '.join(str(o) for o in d.offsets)
+              + (', … {} more'.format(more) if more else ''), file=file)
+    for path, msg in result.problems:
+        print("{}: {}".format(path, msg), file=file)
+
+
+def run(args):
+    """Run the --compare-data command from parsed arguments
+
+    Exits with status 1 if the data differs, or 2 for errors.
+    """
+    for f in (args.file_a, args.file_b):
+        if not (isinstance(f, str) or f.is_file()):
+            print("Not a file:", f, file=sys.stderr)
+            sys.exit(2)
+    try:
+        result = compare_files(args.file_a, args.file_b, args.path,
+                               jobs=args.jobs)
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        sys.exit(2)
+    print_comparison(result)
+    sys.exit(1 if result.differs else 0)
@@ -0,0 +1,202 @@
+"""Estimate how well a dataset would compress with different filters
+
+A sample of chunks spread over the dataset is read, and each chunk is
+written to an in-memory HDF5 file with each candidate filter. The chunk
+cache is turned off, so data is compressed as it's written and
+decompressed as it's read back, and we can time both.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+import time
+
+import h5py
+import numpy
+
+from .mapped import read
+from .profiles import open_file
+from .sampling import (
+    DEFAULT_MAX_CHUNKS, chunk_grid, chunk_selection, spread_chunk_indices,
+    storage_chunks,
+)
+from .utils import fmt_bytes
+
+
+def candidate_filters():
+    """Filters to try, as {name: dataset creation options}
+
+    Filters from hdf5plugin (blosc, lz4, zstd, bitshuffle) are included if
+    it is installed.
+    """
+    res = {
+        'none': {},
+        'gzip-1': dict(compression='gzip', compression_opts=1),
+        'gzip-4': dict(compression='gzip', compression_opts=4),
+        'gzip-9': dict(compression='gzip', compression_opts=9),
+        'shuffle+gzip-4': dict(shuffle=True, compression='gzip',
+                               compression_opts=4),
+        'lzf': dict(compression='lzf'),
+    }
+    try:
+        import hdf5plugin
+    except ImportError:
+        return res
+    res.update({
+        'blosc-lz4': dict(hdf5plugin.Blosc(cname='lz4', clevel=5)),
+        'blosc-zstd': dict(hdf5plugin.Blosc(cname='zstd', clevel=5)),
+        'lz4': dict(hdf5plugin.LZ4()),
+        'zstd': dict(hdf5plugin.Zstd()),
+        'bitshuffle-lz4': dict(hdf5plugin.Bitshuffle()),
+    })
+    return res
+
+
+def can_try_compression(ds):
+    """Filters can only be tried on chunkable data of a fixed size type"""
+    return (isinstance(ds, h5py.Dataset) and bool(ds.shape)
+            and ds.size > 0 and not ds.dtype.hasobject)
+
+
+class FilterResult:
+    """Totals for one filter over the sampled chunks"""
+    def __init__(self, name):
+        self.name = name
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.encode_s = 0.
+        self.decode_s = 0.
+        self.error = None
+
+    def add(self, other):
+        self.raw_bytes += other.raw_bytes
+        self.stored_bytes += other.stored_bytes
+        self.encode_s += other.encode_s
+        self.decode_s += other.decode_s
+        self.error = self.error or other.error
+
+    @property
+    def ratio(self):
+        return self.raw_bytes / self.stored_bytes if self.stored_bytes else 0.
+
+    def speeds(self):
+        """Encode & decode speeds in bytes/second"""
+        return tuple(self.raw_bytes / s if s else math.inf
+                     for s in (self.encode_s, self.decode_s))
+
+
+def trial_chunk(arr, name, options, f):
+    """Compress & decompress one array in the in-memory file f"""
+    res = FilterResult(name)
+    res.raw_bytes = arr.nbytes
+    try:
+        ds = f.create_dataset(name, shape=arr.shape, dtype=arr.dtype,
+                              chunks=arr.shape, **options)
+        t0 = time.perf_counter()
+        ds[...] = arr
+        res.encode_s = time.perf_counter() - t0
+        res.stored_bytes = ds.id.get_storage_size()
+        t0 = time.perf_counter()
+        back = ds[...]
+        res.decode_s = time.perf_counter() - t0
+        if not numpy.array_equal(back, arr, equal_nan=arr.dtype.kind in 'fc'):
+            res.error = "data changed in round trip"
+    except Exception as e:
+        res.error = str(e) or type(e).__name__
+    finally:
+        if name in f:
+            del f[name]
+    return res
+
+
+def trial_chunks(filename, path, indices):
+    """Read some chunks of a dataset & try each filter on them
+
+    This runs in worker processes, returning {filter name: FilterResult}.
+    """
+    filters = candidate_filters()
+    totals = {name: FilterResult(name) for name in filters}
+    with open_file(filename) as src, \
+            h5py.File('trial', 'w', driver='core', backing_store=False,
+                      rdcc_nbytes=0) as mem:
+        ds = src[path]
+        chunks = storage_chunks(ds)
+        for index in indices:
+            arr = read(ds, chunk_selection(index, ds.shape, chunks))
+            for name, options in filters.items():
+                totals[name].add(trial_chunk(arr, name, options, mem))
+    return totals
+
+
+class TrialReport:
+    def __init__(self, path, nbytes, stored_bytes, current, nchunks,
+                 nsampled, results):
+        self.path = path
+        self.nbytes = nbytes                # Uncompressed size
+        self.stored_bytes = stored_bytes    # Size in the file now
+        self.current = current              # Description of current filters
+        self.nchunks = nchunks
+        self.nsampled = nsampled
+        self.results = results              # List of FilterResult
+
+
+def describe_filters(ds):
+    if ds.compression is None:
+        return 'no compression'
+    desc = ds.compression
+    if ds.compression_opts is not None:
+        desc += ' ({})'.format(ds.compression_opts)
+    return ('shuffle+' if ds.shuffle else '') + desc
+
+
+def try_compression(filename, path, max_chunks=DEFAULT_MAX_CHUNKS, jobs=None):
+    """Try compressing a sample of a dataset with each candidate filter"""
+    with open_file(filename) as f:
+        ds = f[path]
+        if not can_try_compression(ds):
+            raise ValueError("Can't try compression filters on {} ({}, {})"
+                             .format(path, ds.shape, ds.dtype))
+        grid = chunk_grid(ds.shape, storage_chunks(ds))
+        indices = spread_chunk_indices(grid, max_chunks)
+        report = TrialReport(
+            ds.name, ds.size * ds.dtype.itemsize, ds.id.get_storage_size(),
+            describe_filters(ds), math.prod(grid), len(indices), [],
+        )
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(indices))
+    batches = [indices[i::jobs] for i in range(jobs)]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parts = list(pool.map(trial_chunks, [str(filename)] * jobs,
+                                  [path] * jobs, batches))
+    else:
+        parts = [trial_chunks(filename, path, indices)]
+
+    totals = {name: FilterResult(name) for name in parts[0]}
+    for part in parts:
+        for name, res in part.items():
+            totals[name].add(res)
+    report.results = list(totals.values())
+    return report
+
+
+def print_trial_report(report, file=None):
+    sampled = sum(r.raw_bytes for r in report.results[:1])
+    print("{}: {} uncompressed, {} stored now with {}".format(
+        report.path, fmt_bytes(report.nbytes), fmt_bytes(report.stored_bytes),
+        report.current), file=file)
+    print("Sampled {} of {} chunks ({})".format(
+        report.nsampled, report.nchunks, fmt_bytes(sampled)), file=file)
+    print(file=file)
+    print("{:<16} {:>11} {:>7} {:>13} {:>13}".format(
+        'Filter', 'Est. size', 'Ratio', 'Encode MiB/s', 'Decode MiB/s'),
+        file=file)
+    for r in report.results:
+        if r.error:
+            print("{:<16} failed: {}".format(r.name, r.error), file=file)
+            continue
+        est = report.nbytes / r.ratio if r.ratio else 0
+        enc, dec = (s / (1 << 20) for s in r.speeds())
+        print("{:<16} {:>11} {:>7.2f} {:>13.1f} {:>13.1f}".format(
+            r.name, fmt_bytes(est), r.ratio, enc, dec), file=file)
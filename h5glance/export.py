@@ -0,0 +1,123 @@
+"""Save a selection from a dataset to a .npy or raw binary file
+
+Data is copied in blocks, so memory use doesn't depend on the size of the
+selection.
+"""
+import math
+from pathlib import Path
+
+import h5py
+import numpy
+import numpy.lib.format
+
+from .selection import BLOCK_BYTES, iter_blocks
+from .utils import ProgressBar
+
+FORMATS = {'.npy': 'npy', '.raw': 'raw', '.bin': 'raw'}
+
+
+def selection_shape(shape, index):
+    """The shape of the array selected by index, without reading any data"""
+    # A zero-size view standing in for the dataset; slicing it is free
+    return numpy.broadcast_to(numpy.empty((), dtype=bool), shape)[index].shape
+
+
+def write_npy_header(f, dtype, shape):
+    header = {
+        'descr': numpy.lib.format.dtype_to_descr(dtype),
+        'fortran_order': False,
+        'shape': shape,
+    }
+    try:
+        numpy.lib.format.write_array_header_1_0(f, header)
+    except ValueError:  # Header too big for format 1.0
+        numpy.lib.format.write_array_header_2_0(f, header)
+
+
+def _full_axes(index, shape):
+    """Does index select all of every axis after the first?"""
+    for ix, n in zip(index[1:], shape[1:]):
+        if not (isinstance(ix, slice) and ix.indices(n) == (0, n, 1)):
+            return False
+    return len(index) <= len(shape)
+
+
+def can_copy_raw_chunks(ds, index):
+    """Can the selection be copied from stored chunks without decoding them?
+
+    This is possible for chunked datasets with no filters, stored as
+    exactly the type numpy reads, where each chunk holds whole rows, and the
+    selection is a contiguous range of rows.
+    """
+    if not ds.chunks or ds.id.get_create_plist().get_nfilters():
+        return False
+    if ds.id.get_type() != h5py.h5t.py_create(ds.dtype):
+        return False  # e.g. a custom float type, converted as it's read
+    if ds.chunks[1:] != ds.shape[1:] or not index:
+        return False
+    if not isinstance(index[0], slice) or index[0].indices(ds.shape[0])[2] != 1:
+        return False
+    return _full_axes(index, ds.shape)
+
+
+def iter_raw_chunks(ds, index):
+    """Yield bytes for a range of rows, read as raw chunks where possible"""
+    start, stop, _ = index[0].indices(ds.shape[0])
+    rows_per_chunk = ds.chunks[0]
+    row_bytes = ds.dtype.itemsize * math.prod(ds.shape[1:])
+    first_chunk = start // rows_per_chunk
+    for c in range(first_chunk, -(-stop // rows_per_chunk)):
+        c_start = c * rows_per_chunk
+        lo = max(start, c_start)
+        hi = min(stop, c_start + rows_per_chunk)
+        offset = (c_start,) + (0,) * (ds.ndim - 1)
+        try:
+            _, data = ds.id.read_direct_chunk(offset)
+        except Exception:
+            # e.g. chunk not allocated - read it normally to get fill values
+            yield memoryview(ds[lo:hi].tobytes())
+            continue
+        yield memoryview(data)[(lo - c_start) * row_bytes:
+                               (hi - c_start) * row_bytes]
+
+
+def export_selection(ds: h5py.Dataset, index, out_path, block_bytes=BLOCK_BYTES,
+                     progress=True):
+    """Write ds[index] to a .npy or raw binary (.raw, .bin) file"""
+    out_path = Path(out_path)
+    fmt = FORMATS.get(out_path.suffix.lower())
+    if fmt is None:
+        raise ValueError("Output file should end with .npy, .raw or .bin")
+    if ds.dtype.kind not in 'biufcSV' or ds.dtype.hasobject:
+        raise ValueError(
+            "Can't export datasets of this type ({})".format(ds.dtype))
+    if ds.shape is None:
+        raise ValueError("Can't export an empty dataset")
+
+    if not isinstance(index, tuple):
+        index = (index,)
+    if index == () and ds.ndim:
+        index = (slice(None),)  # Whole dataset, read in blocks
+    try:
+        shape = selection_shape(ds.shape, index)
+    except (IndexError, TypeError) as e:
+        raise ValueError("Error slicing: {}".format(e))
+    nbytes = ds.dtype.itemsize * math.prod(shape)
+    bar = ProgressBar(nbytes, label=out_path.name + ' ') if progress else None
+
+    if can_copy_raw_chunks(ds, index):
+        pieces = iter_raw_chunks(ds, index)
+    else:
+        pieces = (numpy.ascontiguousarray(a).data
+                  for a in iter_blocks(ds, index, block_bytes))
+
+    with out_path.open('wb') as f:
+        if fmt == 'npy':
+            write_npy_header(f, ds.dtype, shape)
+        for piece in pieces:
+            f.write(piece)
+            if bar:
+                bar.update(piece.nbytes)
+    if bar:
+        bar.close()
+    return nbytes
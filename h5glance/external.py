@@ -0,0 +1,150 @@
+"""Follow external links into other HDF5 files
+
+Files made up mostly of external links often point thousands of times into
+the same few files. Target files are found once per distinct file, checking
+in parallel threads (which helps on network filesystems), and kept in a
+pool of open files, so each is normally opened only once.
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import os
+from urllib.parse import urljoin
+
+import h5py
+import h5py.h5o
+
+from .paths import is_url
+from .profiles import open_file
+
+MAX_OPEN_FILES = 32
+CHECK_THREADS = 16
+
+
+def find_target_file(base_file, link_filename):
+    """Find the file an external link refers to, or return None
+
+    Relative paths are looked up like HDF5 does: in the directories listed
+    in HDF5_EXT_PREFIX, then relative to the file containing the link, then
+    relative to the working directory. Links in remote files are looked up
+    relative to the file's URL.
+    """
+    if is_url(base_file) and not os.path.isabs(link_filename):
+        return urljoin(base_file, link_filename)
+    candidates = [link_filename]
+    if not os.path.isabs(link_filename):
+        prefixes = [p for p in os.environ.get('HDF5_EXT_PREFIX', '').split(':')
+                    if p]
+        candidates = [os.path.join(p, link_filename) for p in prefixes] + [
+            os.path.join(os.path.dirname(base_file), link_filename),
+            link_filename,
+        ]
+    for path in candidates:
+        if os.path.isfile(path):
+            return os.path.realpath(path)
+    return None
+
+
+class FilePool:
+    """Open files, keeping at most *max_open* of them open
+
+    Files are closed in least-recently-used order. A file which is in use
+    (acquired & not yet released) is never closed, so the limit can be
+    exceeded while following a chain of links through more files than that.
+    """
+    def __init__(self, max_open=MAX_OPEN_FILES):
+        self.max_open = max_open
+        self.files = OrderedDict()  # real path -> h5py.File
+        self.users = {}
+        self.n_opened = 0
+
+    def acquire(self, path):
+        if path in self.files:
+            self.files.move_to_end(path)
+        else:
+            self.files[path] = open_file(path)
+            self.n_opened += 1
+        self.users[path] = self.users.get(path, 0) + 1
+        self._close_unused()
+        return self.files[path]
+
+    def release(self, path):
+        self.users[path] -= 1
+
+    def _close_unused(self):
+        for path in list(self.files):
+            if len(self.files) <= self.max_open:
+                break
+            if not self.users.get(path):
+                self.files.pop(path).close()
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files.clear()
+        self.users.clear()
+
+
+class ExternalLinks:
+    """Resolve external links to objects in other files
+
+    ``visited`` records objects reached through links, keyed by (real file
+    path, object address), to detect cycles & repeated targets.
+    """
+    def __init__(self, max_open=MAX_OPEN_FILES, threads=CHECK_THREADS):
+        self.pool = FilePool(max_open)
+        self.threads = threads
+        self.visited = {}
+        self._targets = {}  # (linking file, link filename) -> real path
+
+    def check(self, links):
+        """Find the target files of many links, in parallel threads
+
+        *links* is an iterable of (group, ExternalLink) pairs. Each
+        different file is only looked up once.
+        """
+        todo = []
+        for grp, link in links:
+            key = (grp.file.filename, link.filename)
+            if key not in self._targets and key not in todo:
+                todo.append(key)
+        if len(todo) > 1:
+            with ThreadPoolExecutor(max_workers=self.threads) as pool:
+                found = list(pool.map(find_target_file, *zip(*todo)))
+        else:
+            found = [find_target_file(*key) for key in todo]
+        self._targets.update(zip(todo, found))
+
+    def follow(self, grp, link):
+        """Open the target of an external link in *grp*
+
+        Returns (file path, object, error message). If the object was found,
+        call :meth:`release` with the path when finished with it.
+        """
+        key = (grp.file.filename, link.filename)
+        if key not in self._targets:
+            self.check([(grp, link)])
+        path = self._targets[key]
+        if path is None:
+            return None, None, 'file not found'
+        try:
+            f = self.pool.acquire(path)
+        except Exception as e:
+            return None, None, 'error opening file: {}'.format(e)
+        try:
+            obj = f.get(link.path)
+        except Exception:
+            obj = None
+        if obj is None:
+            self.release(path)
+            return None, None, 'object not found'
+        return path, obj, None
+
+    def release(self, path):
+        self.pool.release(path)
+
+    @staticmethod
+    def object_key(path, obj):
+        return path, h5py.h5o.get_info(obj.id).addr
+
+    def close(self):
+        self.pool.close()
@@ -1,10 +1,19 @@
 import h5py
+import base64
+from functools import lru_cache
+import math
+import os
+import re
 from htmlgen import (Document, Element, Division, UnorderedList, Checkbox,
                      Label, ListItem, html_attribute, Span, Link, Script,
+                     Image, Paragraph,
                      )
 from pathlib import Path
 
 from .datatypes import fmt_dtype, dtype_description
+from .external import ExternalLinks
+from .profiles import open_file
+from .paths import is_url
 from . import utils
 
 _PKGDIR = Path(__file__).parent
@@ -64,7 +73,13 @@ def checkbox_w_label(label_content):
     l.for_ = c.id
     return [c, l]
 
-def item_for_dataset(name, ds):
+def thumbnail_image(png_data):
+    url = "data:image/png;base64," + base64.b64encode(png_data).decode('ascii')
+    img = Image(url, "thumbnail")
+    img.add_css_classes("h5glance-thumbnail")
+    return img
+
+def item_for_dataset(name, ds, thumbnail=None):
     namespan = Span(name)
     namespan.add_css_classes("h5glance-dataset-name")
     if ds is None:
@@ -79,6 +94,8 @@ def item_for_dataset(name, ds):
         namespan,  " ", copylink, ": ",
         shape, " entries, dtype: ", make_dtype_abbr(ds.id.get_type())
     )
+    if thumbnail:
+        li.append(thumbnail_image(thumbnail))
     li.add_css_classes("h5glance-dataset")
     return li
 
@@ -89,16 +106,39 @@ def item_for_link(name, link):
         target = link.path
     return ListItem(name, " → ", target)
 
-def leaf_item(name, obj):
+def leaf_item(name, obj, thumbnails=None):
     if utils.is_dataset(obj):
-        return item_for_dataset(name, obj)
+        return item_for_dataset(name, obj, (thumbnails or {}).get(obj.name))
     else:
         return item_for_link(name, obj)
 
-def item_for_group(gname, grp):
-    # Like many file managers, we'll sort
+def item_for_external(name, grp, link, external, max_depth=math.inf,
+                      max_children=None, more_url=None):
+    """Show the target of an external link, with an ExternalLinks object"""
+    label = f'{name} → {link.filename}/{link.path}'
+    path, obj, error = external.follow(grp, link)
+    if obj is None:
+        return ListItem(label, " ({})".format(error))
+    try:
+        key = external.object_key(path, obj)
+        if key in external.visited:
+            return ListItem(label, " (= {})".format(external.visited[key]))
+        external.visited[key] = path + obj.name
+        if utils.is_group(obj):
+            return item_for_group(label, obj, None, max_depth, max_children,
+                                  more_url, external)
+        return item_for_dataset(label, obj)
+    finally:
+        external.release(path)
+
+def member_items(grp, names, thumbnails=None, max_depth=math.inf,
+                 max_children=None, more_url=None, external=None):
+    """List items for some members of a group
+
+    Like many file managers, we'll show subgroups first.
+    """
     subgroups, items = [], []
-    for name in grp:
+    for name in names:
         link = grp.get(name, getlink=True)
         if isinstance(link, h5py.HardLink):
             obj = grp[name]
@@ -109,10 +149,61 @@ def item_for_group(gname, grp):
         else:
             items.append((name, link))
 
-    return ListItem(*checkbox_w_label(gname), make_list(
-        *[item_for_group(n, g) for n, g in subgroups],
-        *[leaf_item(n, o) for n, o in items],
-    ))
+    if external is not None:
+        external.check((grp, o) for _, o in items
+                       if isinstance(o, h5py.ExternalLink))
+
+    opts = (max_depth - 1, max_children, more_url)
+    return [
+        *[item_for_group(n, g, thumbnails, *opts, external)
+          for n, g in subgroups],
+        *[item_for_external(n, grp, o, external, *opts)
+          if external is not None and isinstance(o, h5py.ExternalLink)
+          else leaf_item(n, o, thumbnails) for n, o in items],
+    ]
+
+def more_item(grp, start, n_hidden, more_url=None):
+    """A marker for members left out, linking to them if possible"""
+    text = "… {} more".format(n_hidden)
+    if more_url is None:
+        return ListItem(text)
+    return ListItem(Link(more_url(grp.name, start), text))
+
+def item_for_group(gname, grp, thumbnails=None, max_depth=math.inf,
+                   max_children=None, more_url=None, external=None):
+    """List a group's members, down to *max_depth* levels of subgroups
+
+    With *max_children*, only the first & last members of large groups are
+    shown. *more_url(group path, start)* can give a link to page through
+    the rest. External links are followed if an
+    :class:`~.external.ExternalLinks` object is passed as *external*.
+    """
+    if max_depth < 1:
+        return ListItem(gname, " ({} members)".format(len(grp)))
+
+    head, n_hidden, tail = utils.head_tail_members(grp, max_children)
+    opts = (thumbnails, max_depth, max_children, more_url, external)
+    list_items = member_items(grp, head, *opts)
+    if n_hidden:
+        list_items.append(more_item(grp, len(head), n_hidden, more_url))
+        list_items += member_items(grp, tail, *opts)
+
+    return ListItem(*checkbox_w_label(gname), make_list(*list_items))
+
+def shown_datasets(grp, max_depth=math.inf, max_children=None):
+    """Paths of the datasets :func:`item_for_group` shows in a group"""
+    if max_depth < 1:
+        return []
+    head, _, tail = utils.head_tail_members(grp, max_children)
+    paths = []
+    for name in head + tail:
+        if isinstance(grp.get(name, getlink=True), h5py.HardLink):
+            obj = grp[name]
+            if utils.is_group(obj):
+                paths += shown_datasets(obj, max_depth - 1, max_children)
+            elif utils.is_dataset(obj):
+                paths.append(obj.name)
+    return paths
 
 def file_or_grp_name(obj):
     if utils.is_file(obj):
@@ -123,13 +214,41 @@ def file_or_grp_name(obj):
 
 treeview_ids = id_generator("h5glance-container-%d")
 
-def make_fragment(obj):
+def make_fragment(obj, thumbnails=False, max_depth=None, max_children=None,
+                  more_url=None, follow_external=False, jobs=None):
+    """Make the HTML tree view of a file or group
+
+    With *thumbnails*, 2D & 3D datasets get small images of their content,
+    made in up to *jobs* processes.
+    *max_depth* limits how many levels of groups are shown, and
+    *max_children* how many members of each group (see :func:`item_for_group`).
+    With *follow_external*, the targets of external links are shown.
+    """
+    if max_depth is None:
+        max_depth = math.inf
     if utils.is_group(obj):
         name = file_or_grp_name(obj)
-        ct = make_list(item_for_group(name, obj))
-    elif isinstance(obj, (str, Path)) and h5py.is_hdf5(obj):
-        with h5py.File(obj, 'r') as f:
-            return make_fragment(f)
+        thumbs = None
+        if thumbnails and isinstance(obj, h5py.Group):
+            from .thumbnails import make_thumbnails
+            paths = shown_datasets(obj, max(max_depth, 1), max_children)
+            thumbs = make_thumbnails(obj, jobs=jobs, paths=paths)
+        external = None
+        if follow_external and isinstance(obj, h5py.Group):
+            external = ExternalLinks()
+            root_path = os.path.realpath(obj.file.filename)
+            external.visited[external.object_key(root_path, obj)] = \
+                root_path + obj.name
+        try:
+            ct = make_list(item_for_group(name, obj, thumbs, max(max_depth, 1),
+                                          max_children, more_url, external))
+        finally:
+            if external is not None:
+                external.close()
+    elif isinstance(obj, (str, Path)) and (is_url(obj) or h5py.is_hdf5(obj)):
+        with open_file(obj) as f:
+            return make_fragment(f, thumbnails, max_depth, max_children,
+                                 more_url, follow_external, jobs)
     else:
         raise TypeError("Unknown object type: {!r}".format(obj))
 
@@ -142,9 +261,12 @@ def make_fragment(obj):
     tv.id = next(treeview_ids)
     return tv
 
+@lru_cache()
+def _read_asset(name):
+    return (_PKGDIR / name).read_text('utf-8')
+
 def get_treeview_css():
-    with (_PKGDIR / 'treeview.css').open() as f:
-        return Style(f.read())
+    return Style(_read_asset('treeview.css'))
 
 JS_ACTIVATE_COPYLINKS_DOC = """
 window.addEventListener("load", function(event) {
@@ -157,19 +279,53 @@ enable_copylinks(document.getElementById("TREEVIEW-ID"));
 """
 
 def get_copylinks_js(activation):
-    with (_PKGDIR / "copypath.js").open() as f:
-        return f.read().replace("//ACTIVATE", activation)
+    return _read_asset("copypath.js").replace("//ACTIVATE", activation)
 
-def make_document(obj):
+def wrap_document(body, title):
+    """Make a full HTML document around a tree view
+
+    *body* may be an htmlgen element or a string of pre-rendered HTML.
+    """
     d = Document()
     d.append_head(get_treeview_css())
     d.append_head(Script(script=get_copylinks_js(JS_ACTIVATE_COPYLINKS_DOC)))
-    d.title = "{} - H5Glance".format(file_or_grp_name(obj))
-    d.append_body(make_fragment(obj))
+    d.title = "{} - H5Glance".format(title)
+    if isinstance(body, str):
+        d.root.body.children.append_raw(body)
+    else:
+        d.append_body(body)
     return d
 
-def h5obj_to_html(obj):
-    treeview = make_fragment(obj)
+def make_document(obj, thumbnails=False, max_depth=None, max_children=None,
+                  more_url=None, follow_external=False):
+    fragment = make_fragment(obj, thumbnails, max_depth, max_children, more_url,
+                             follow_external)
+    return wrap_document(fragment, file_or_grp_name(obj))
+
+def make_members_document(grp, start, count, max_children=None, more_url=None):
+    """A page listing members start:start+count of a large group"""
+    n = len(grp)
+    names = utils.member_names(grp, start, count)
+    stop = start + len(names)
+    ul = make_list(*member_items(grp, names, max_children=max_children,
+                                 more_url=more_url))
+    tv = Division(ul)
+    tv.add_css_classes("h5glance-css-treeview")
+    tv.id = next(treeview_ids)
+
+    nav = Paragraph("Members {}–{} of {} in {} ".format(
+        start + 1, stop, n, grp.name))
+    if start > 0 and more_url is not None:
+        nav.append(Link(more_url(grp.name, max(start - count, 0)), "← previous"))
+        nav.append(" ")
+    if stop < n and more_url is not None:
+        nav.append(Link(more_url(grp.name, stop), "next →"))
+    return wrap_document(Division(nav, tv), grp.name)
+
+def _render_html(obj, thumbnails=False, max_depth=None, max_children=None,
+                 follow_external=False):
+    treeview = make_fragment(obj, thumbnails, max_depth, max_children,
+                             follow_external=follow_external)
     js_activate = JS_ACTIVATE_COPYLINKS_FRAG.replace("TREEVIEW-ID", treeview.id)
 
     div = Division(
@@ -179,4 +335,50 @@ def h5obj_to_html(obj):
     )
     return str(div)
 
+@lru_cache(maxsize=16)
+def _cached_html(filename, path, mtime_ns, size, *options):
+    # mtime_ns & size are only part of the cache key, to re-render changed files
+    # path is None for the whole file, which is labelled with its filename
+    with open_file(filename) as f:
+        return _render_html(f if path is None else f[path], *options)
+
+_ID_RE = re.compile(r'h5glance-(expand-switch|container)-\d+')
+
+def renumber_ids(html):
+    """Give the elements in a rendered tree view new unique IDs
+
+    This lets the same cached HTML be displayed more than once on a page.
+    """
+    new_ids = {}
+    def replace(m):
+        if m[0] not in new_ids:
+            ids = treeview_ids if m[1] == 'container' else checkbox_ids
+            new_ids[m[0]] = next(ids)
+        return new_ids[m[0]]
+    return _ID_RE.sub(replace, html)
+
+def h5obj_to_html(obj, thumbnails=False, max_depth=None, max_children=None,
+                  follow_external=False):
+    """Render a file or group as HTML, e.g. to display in Jupyter
+
+    For files opened read-only, the HTML is cached, and reused until the
+    file is modified. With *follow_external*, changes to the files external
+    links point to are not detected.
+    """
+    options = (thumbnails, max_depth, max_children, follow_external)
+    if isinstance(obj, (str, Path)):
+        filename, path = str(obj), None
+    elif isinstance(obj, h5py.File) and obj.mode == 'r':
+        filename, path = obj.filename, None
+    elif isinstance(obj, h5py.Group) and obj.file.mode == 'r':
+        filename, path = obj.file.filename, obj.name
+    else:
+        return _render_html(obj, *options)
 
+    try:
+        st = os.stat(filename)
+    except OSError:  # e.g. in-memory files
+        return _render_html(obj, *options)
+    html = _cached_html(filename, path, st.st_mtime_ns,
+                        st.st_size, *options)
+    return renumber_ids(html)
@@ -1,27 +1,40 @@
 """Command line h5glance-html interface for writing and serving HTML views of HDF5
 """
-import argparse
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import gzip
 import h5py
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from htmlgen import Document, Link, ListItem, Paragraph, Span, UnorderedList
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import os
 from pathlib import Path
 import sys
 import threading
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlsplit
 import webbrowser
 
-from .html import make_document
+from .cli import html_main as main  # noqa: F401
+from .html import (
+    make_document, make_fragment, make_members_document, wrap_document,
+)
+from .profiles import open_file
+from . import remote
+from .paths import is_url
 
-def main(argv=None):
-    from . import __version__
-    ap = argparse.ArgumentParser(prog="h5glance-html",
-                                 description="View HDF5 file structure in HTML")
-    ap.add_argument("input", help="HDF5 file to view", type=Path)
-    ap.add_argument("-w", "--write", metavar="HTML_FILE",
-                    help="Write output to HTML file.")
-    ap.add_argument('--version', action='version',
-                    version='h5glance-html {}'.format(__version__))
-    args = ap.parse_args(argv)
+def run(args):
+    """Run the h5glance-html command with parsed arguments (see .cli)"""
 
-    if not args.input.is_file():
+    if is_url(args.input):
+        atexit.register(remote.print_stats)
+    elif args.input.is_dir():
+        if args.write:
+            sys.exit("Writing HTML is only possible for a single file")
+        view = DirectoryView(args.input, args.thumbnails,
+                             max_children=args.max_children,
+                             follow_external=args.follow_external)
+        return serve_view(view, host=args.host, port=args.port)
+    elif not args.input.is_file():
         print("Not a file:", args.input)
         sys.exit(2)
     elif not h5py.is_hdf5(args.input):
@@ -30,21 +43,316 @@ def main(argv=None):
 
     if args.write:
         with open(args.write, 'w') as f:
-            f.write(str(make_document(args.input)))
+            f.write(str(make_document(args.input, args.thumbnails,
+                                      max_children=args.max_children,
+                                      follow_external=args.follow_external)))
             return
 
-    serve(args.input)
+    serve(args.input, args.thumbnails, host=args.host, port=args.port,
+          max_children=args.max_children, follow_external=args.follow_external)
 
-def serve(h5path):
+# Don't bother compressing small responses
+GZIP_MIN_SIZE = 1024
+
+class Rendered:
+    """An HTML response, with its ETag (or None) and optional gzipped form"""
+    def __init__(self, body: bytes, etag):
+        self.body = body
+        self.etag = etag
+        self.gzipped = None
+        if len(body) >= GZIP_MIN_SIZE:
+            self.gzipped = gzip.compress(body, compresslevel=6)
+
+def members_url(page, group_path, start):
+    """The URL for more members of a large group"""
+    return page + '?' + urlencode({'members': group_path, 'start': start})
+
+def get_members(file, query, max_children, page):
+    """Render a page of members of a group, as requested in a URL query"""
+    grp = file.get(query.get('members', [''])[0])
+    if not isinstance(grp, h5py.Group):
+        return None
+    try:
+        start = max(int(query.get('start', ['0'])[0]), 0)
+    except ValueError:
+        return None
+    count = max_children or len(grp)
+    doc = make_members_document(grp, start, count, max_children,
+                                partial(members_url, page))
+    return Rendered(str(doc).encode('utf-8'), None)
+
+class FileView:
+    """The HTML view of one HDF5 file, shared between request threads
+
+    The file is kept open between requests, and the rendered page is reused
+    until the file's modification time or size changes. h5py calls are
+    serialised with a lock.
+    """
+    def __init__(self, h5path, thumbnails=False, max_children=None,
+                 follow_external=False):
+        self.h5path = h5path
+        self.thumbnails = thumbnails
+        self.max_children = max_children
+        self.follow_external = follow_external
+        self.lock = threading.Lock()
+        self.file = None
+        self.rendered = None
+        self.stamp = None
+
+    def _file_stamp(self):
+        if is_url(self.h5path):
+            return remote.stat_url(self.h5path)
+        st = os.stat(self.h5path)
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, url_path, query=None):
+        if url_path != "/":
+            return None
+        if query and 'members' in query:
+            self.render()  # Reopen the file if it has changed
+            with self.lock:
+                return get_members(self.file, query, self.max_children, "/")
+        return self.render()
+
+    def render(self) -> Rendered:
+        stamp = self._file_stamp()
+        with self.lock:
+            if self.rendered is not None and self.stamp == stamp:
+                return self.rendered
+            if self.file is not None:
+                self.file.close()  # Reopen to see changes to the file
+            self.file = open_file(self.h5path)
+            doc = make_document(self.file, self.thumbnails,
+                                max_children=self.max_children,
+                                more_url=partial(members_url, "/"),
+                                follow_external=self.follow_external)
+            body = str(doc).encode('utf-8')
+            self.rendered = Rendered(body, '"{:x}-{:x}"'.format(*stamp))
+            self.stamp = stamp
+            return self.rendered
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+HDF5_SUFFIXES = {'.h5', '.hdf5', '.hdf', '.nxs', '.cxi'}
+
+def _index_file(path, thumbnails, max_children=None, page=None,
+                follow_external=False):
+    # Runs in a worker process, so thumbnails are made here, not in a
+    # pool of their own
+    more_url = partial(members_url, page) if page else None
+    return str(make_fragment(path, thumbnails, max_children=max_children,
+                             more_url=more_url,
+                             follow_external=follow_external, jobs=1))
+
+class IndexEntry:
+    """Indexing state for one file in a directory"""
+    def __init__(self, stamp):
+        self.stamp = stamp
+        self.state = 'pending'  # -> 'indexed' or 'error'
+        self.fragment = None
+        self.error = None
+        self.rendered = None
+
+class DirectoryView:
+    """Browse all the HDF5 files in a directory tree
+
+    Files are listed straight away, and their structures are indexed in a
+    background process pool. Indexed files are served from memory until
+    their modification time or size changes.
+    """
+    def __init__(self, directory, thumbnails=False, jobs=None,
+                 max_children=None, follow_external=False):
+        self.directory = Path(directory)
+        self.thumbnails = thumbnails
+        self.max_children = max_children
+        self.follow_external = follow_external
+        # Re-entrant, because a future which has already finished runs its
+        # callback (which takes the lock) inside _submit
+        self.lock = threading.RLock()
+        self.entries = {}
+        self.pool = ProcessPoolExecutor(max_workers=jobs)
+        self.refresh()
+
+    def scan(self):
+        """Find HDF5 files, returning {relative path: (mtime, size)}"""
+        res = {}
+        for dirpath, dirnames, filenames in os.walk(self.directory):
+            dirnames.sort()
+            for fn in sorted(filenames):
+                if os.path.splitext(fn)[1].lower() not in HDF5_SUFFIXES:
+                    continue
+                full = os.path.join(dirpath, fn)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                rel = os.path.relpath(full, self.directory).replace(os.sep, '/')
+                res[rel] = (st.st_mtime_ns, st.st_size)
+        return res
+
+    def refresh(self):
+        """Rescan the directory, and queue new or modified files to index"""
+        found = self.scan()
+        with self.lock:
+            for rel in set(self.entries) - set(found):
+                del self.entries[rel]
+            for rel, stamp in found.items():
+                entry = self.entries.get(rel)
+                if entry is None or entry.stamp != stamp:
+                    self._submit(rel, stamp)
+
+    def _submit(self, rel, stamp):
+        # Call with self.lock held
+        entry = self.entries[rel] = IndexEntry(stamp)
+        fut = self.pool.submit(_index_file, self.directory / rel,
+                               self.thumbnails, self.max_children,
+                               "/f/" + quote(rel), self.follow_external)
+        fut.add_done_callback(lambda f: self._finished(rel, entry, f))
+
+    def _finished(self, rel, entry, fut):
+        with self.lock:
+            if self.entries.get(rel) is not entry:
+                return  # The file changed again since this was submitted
+            if fut.cancelled():
+                return
+            exc = fut.exception()
+            if exc is None:
+                entry.fragment = fut.result()
+                entry.state = 'indexed'
+            elif entry.state == 'pending':
+                entry.state = 'error'
+                entry.error = str(exc) or type(exc).__name__
+
+    def get(self, url_path, query=None):
+        if url_path == "/":
+            self.refresh()
+            return self.render_index()
+        if url_path.startswith("/f/"):
+            if query and 'members' in query:
+                return self.render_members(url_path[3:], query)
+            return self.render_file(url_path[3:])
+        return None
+
+    def render_index(self):
+        with self.lock:
+            items = sorted(self.entries.items())
+        n_indexed = sum(e.state == 'indexed' for _, e in items)
+        ul = UnorderedList()
+        for rel, entry in items:
+            state = Span(entry.state)
+            state.add_css_classes("h5glance-index-" + entry.state)
+            li = ListItem(Link("/f/" + quote(rel), rel), " ", state)
+            if entry.error:
+                li.append(": " + entry.error)
+            ul.append(li)
+
+        d = Document()
+        d.title = "{} - H5Glance".format(self.directory)
+        d.append_body(Paragraph("{} HDF5 files in {} ({} indexed)".format(
+            len(items), self.directory, n_indexed
+        )))
+        d.append_body(ul)
+        return Rendered(str(d).encode('utf-8'), None)
+
+    def render_file(self, rel):
+        path = self.directory / rel
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        stamp = st.st_mtime_ns, st.st_size
+
+        with self.lock:
+            entry = self.entries.get(rel)
+            if entry is None:
+                return None
+            if entry.stamp != stamp:
+                self._submit(rel, stamp)
+                entry = self.entries[rel]
+            if entry.rendered is not None:
+                return entry.rendered
+
+        if entry.fragment is None:
+            # Not indexed yet - do it now rather than waiting for the pool
+            try:
+                fragment = _index_file(path, self.thumbnails,
+                                       self.max_children, "/f/" + quote(rel),
+                                       self.follow_external)
+            except Exception as e:
+                with self.lock:
+                    entry.state = 'error'
+                    entry.error = str(e) or type(e).__name__
+                body = "Error reading {}: {}".format(rel, entry.error)
+                return Rendered(body.encode('utf-8'), None)
+            with self.lock:
+                entry.fragment = fragment
+                entry.state = 'indexed'
+
+        doc = wrap_document(entry.fragment, rel)
+        rendered = Rendered(str(doc).encode('utf-8'),
+                            '"{:x}-{:x}"'.format(*stamp))
+        with self.lock:
+            entry.rendered = rendered
+        return rendered
+
+    def render_members(self, rel, query):
+        with self.lock:
+            if rel not in self.entries:
+                return None
+        with open_file(self.directory / rel) as f:
+            return get_members(f, query, self.max_children, "/f/" + quote(rel))
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+def make_handler(view):
     class H5ViewHandler(BaseHTTPRequestHandler):
         def do_GET(self):
-            if self.path != "/":
+            url = urlsplit(self.path)
+            rendered = view.get(unquote(url.path), parse_qs(url.query))
+            if rendered is None:
                 return self.send_error(404)
+            self.send_rendered(rendered)
+
+        def send_rendered(self, rendered: Rendered):
+            if rendered.etag and \
+                    rendered.etag in self.headers.get('If-None-Match', ''):
+                self.send_response(304)
+                self.send_header('ETag', rendered.etag)
+                self.end_headers()
+                return
+
+            body = rendered.body
+            accept = self.headers.get('Accept-Encoding', '')
+            use_gzip = rendered.gzipped is not None and 'gzip' in accept
+            if use_gzip:
+                body = rendered.gzipped
+
             self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            if rendered.etag:
+                self.send_header('ETag', rendered.etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Vary', 'Accept-Encoding')
+            if use_gzip:
+                self.send_header('Content-Encoding', 'gzip')
             self.end_headers()
-            self.wfile.write(str(make_document(h5path)).encode('utf-8'))
+            self.wfile.write(body)
+
+    return H5ViewHandler
+
+def serve(h5path, thumbnails=False, host='localhost', port=0,
+          max_children=None, follow_external=False):
+    view = FileView(h5path, thumbnails, max_children, follow_external)
+    serve_view(view, host=host, port=port)
 
-    server = HTTPServer(('localhost', 0), H5ViewHandler)
+def serve_view(view, host='localhost', port=0):
+    server = ThreadingHTTPServer((host, port), make_handler(view))
     url = "http://{}:{}/".format(server.server_name, server.server_port)
     print("Serving on", url)
     t = threading.Timer(0.5, webbrowser.open_new_tab, args=(url,))
@@ -53,3 +361,6 @@ def serve(h5path):
         server.serve_forever()
     except KeyboardInterrupt:
         pass
+    finally:
+        server.server_close()
+        view.close()
@@ -1,25 +1,38 @@
+from functools import partial
 import h5py
 import os
 
+from .profiles import open_file
 from .terminal import group_to_str
 
 class H5Glance:
-    """View an HDF5 object in a Jupyter notebook"""
-    def __init__(self, obj):
+    """View an HDF5 object in a Jupyter notebook
+
+    *max_depth* & *max_children* limit how many levels of groups, and how
+    many members in each group, are shown in the HTML view.
+    """
+    def __init__(self, obj, max_depth=None, max_children=None):
         self.obj = obj
+        self.max_depth = max_depth
+        self.max_children = max_children
 
     def _repr_html_(self):
         from .html import h5obj_to_html
-        return h5obj_to_html(self.obj)
+        return h5obj_to_html(self.obj, max_depth=self.max_depth,
+                             max_children=self.max_children)
 
     def __repr__(self):
         if isinstance(self.obj, (str, bytes, os.PathLike)):
-            with h5py.File(self.obj, 'r') as f:
+            with open_file(self.obj) as f:
                 return repr(H5Glance(f))
         return group_to_str(self.obj, max_depth=1)
 
-def install_ipython_h5py_display(html=True, text=True):
-    """Call inside IPython to install HTML/text views for h5py groups and files"""
+def install_ipython_h5py_display(html=True, text=True, max_depth=None,
+                                 max_children=None):
+    """Call inside IPython to install HTML/text views for h5py groups and files
+
+    *max_depth* & *max_children* limit the HTML view, as for :class:`H5Glance`.
+    """
     from IPython import get_ipython
     ip = get_ipython()
     if ip is None:
@@ -28,7 +41,8 @@ def install_ipython_h5py_display(html=True, text=True):
     if html:
         from .html import h5obj_to_html
         html_formatter = ip.display_formatter.formatters['text/html']
-        html_formatter.for_type(h5py.Group, h5obj_to_html)
+        html_formatter.for_type(h5py.Group, partial(
+            h5obj_to_html, max_depth=max_depth, max_children=max_children))
     if text:
         text_formatter = ip.display_formatter.formatters['text/plain']
         text_formatter.for_type(h5py.Group, pretty_print_group)
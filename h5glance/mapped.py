@@ -0,0 +1,69 @@
+"""Read simple datasets through a memory map, bypassing HDF5
+
+A contiguous dataset with no filters is stored as one plain range of bytes
+in the file. Mapping that range with numpy avoids the HDF5 read pipeline
+and an extra copy, which makes repeated previews of the same data cheap.
+"""
+from functools import lru_cache
+import os
+
+import h5py
+import numpy
+
+
+@lru_cache(maxsize=32)
+def _memmap(filename, offset, dtype, shape, mtime_ns):
+    # mtime_ns is only part of the cache key, so a changed file is remapped
+    return numpy.memmap(filename, dtype=numpy.dtype(dtype), mode='r',
+                        offset=offset, shape=shape)
+
+
+def mapped_array(ds):
+    """Memory-map a dataset's data if possible, or return None
+
+    This works for datasets in files on disk, opened read-only, which are
+    stored contiguously (not chunked, compact or virtual) and already
+    allocated, without external storage, and with a simple numeric type in
+    the machine's native byte order. The type stored in the file must be
+    exactly the one numpy reads, so e.g. a custom 2-byte float, which h5py
+    converts to float32, is read through HDF5.
+    """
+    if not isinstance(ds, h5py.Dataset) or not ds.shape:
+        return None
+    if ds.file.mode != 'r' or ds.file.driver not in ('sec2', 'stdio'):
+        return None
+    dtype = ds.dtype
+    if dtype.kind not in 'biufc' or not dtype.isnative:
+        return None
+    if ds.id.get_type() != h5py.h5t.py_create(dtype):
+        return None
+
+    dcpl = ds.id.get_create_plist()
+    if dcpl.get_layout() != h5py.h5d.CONTIGUOUS or dcpl.get_external_count():
+        return None
+    offset = ds.id.get_offset()
+    nbytes = ds.id.get_storage_size()
+    if offset is None or nbytes == 0:  # Not allocated in the file yet
+        return None
+    if nbytes != ds.size * dtype.itemsize:
+        return None
+
+    filename = ds.file.filename
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    if offset + nbytes > st.st_size:
+        return None
+    return _memmap(filename, offset, dtype.str, ds.shape, st.st_mtime_ns)
+
+
+def array_source(ds):
+    """Get an object to index like ds, using a memory map when possible"""
+    arr = mapped_array(ds)
+    return ds if arr is None else arr
+
+
+def read(ds, index):
+    """Read ds[index] as a numpy array, using a memory map if possible"""
+    return numpy.asarray(array_source(ds)[index])
@@ -0,0 +1,15 @@
+"""Helpers for file arguments, which may be local paths or URLs
+
+This only uses the standard library, so the command line tools can use it
+before importing anything slow.
+"""
+from pathlib import Path
+
+
+def is_url(path):
+    return str(path).startswith(('http://', 'https://'))
+
+
+def path_or_url(s):
+    """Convert a command line argument to a Path, unless it's a URL"""
+    return s if is_url(s) else Path(s)
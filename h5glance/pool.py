@@ -0,0 +1,41 @@
+"""Share out work on the datasets in a file between worker processes
+
+The work on each dataset is split into tasks covering a range of its
+pieces (e.g. chunks), with roughly the same amount of data in each. Worker
+processes keep files open from one task to the next.
+"""
+import math
+
+from .profiles import open_file
+
+# Aim for roughly this much data in each task sent to a worker
+TASK_BYTES = 64 << 20
+
+
+class Task:
+    """A range (start:stop) of the pieces of one dataset, for a worker"""
+    def __init__(self, path, start=0, stop=0, nbytes=0):
+        self.path = path
+        self.start = start
+        self.stop = stop
+        self.nbytes = nbytes
+
+
+def split(n, nbytes):
+    """Split n pieces holding nbytes in total into ranges for tasks
+
+    Returns a list of (start, stop, nbytes in that range).
+    """
+    ntasks = max(1, min(n, math.ceil(nbytes / TASK_BYTES)))
+    bounds = [n * i // ntasks for i in range(ntasks + 1)]
+    return [(a, b, nbytes * (b - a) // n)
+            for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+_worker_files = {}
+
+def worker_file(filename):
+    """Open a file in a worker process, keeping it open for later tasks"""
+    if filename not in _worker_files:
+        _worker_files[filename] = open_file(filename)
+    return _worker_files[filename]
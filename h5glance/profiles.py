@@ -0,0 +1,200 @@
+"""Settings for opening HDF5 files, tuned for different storage
+
+h5glance mostly reads metadata: many small reads scattered through the
+file. On network filesystems like Lustre or GPFS, larger caches and reads
+can make this much faster. Settings are collected from, in order of
+priority:
+
+1. Command line options
+2. The ``H5GLANCE_OPEN`` environment variable, e.g.
+   ``profile=network,rdcc_nbytes=64M``
+3. The ``[open]`` section of ``~/.config/h5glance/config.ini``
+
+Named profiles can also be defined in the config file, in sections like
+``[profile:myprofile]``.
+"""
+import configparser
+import os
+from pathlib import Path
+import statistics
+import time
+
+import h5py
+
+from . import remote
+from .paths import is_url
+
+MiB = 1 << 20
+
+BUILTIN_PROFILES = {
+    'default': {},
+    # Fewer, larger reads for metadata & raw data
+    'network': {
+        'rdcc_nbytes': 64 * MiB,
+        'rdcc_nslots': 100_003,
+        'page_buf_size': 16 * MiB,
+        'meta_block_size': 1 * MiB,
+        'mdc_size': 32 * MiB,
+    },
+    # Read the whole file into memory at once (only for small files)
+    'core': {
+        'driver': 'core',
+        'backing_store': False,
+    },
+}
+
+# Only try the 'core' profile in benchmarks for files up to this size
+CORE_MAX_SIZE = 256 * MiB
+
+INT_SETTINGS = {'rdcc_nbytes', 'rdcc_nslots', 'page_buf_size',
+                'meta_block_size', 'mdc_size'}
+SETTINGS = INT_SETTINGS | {'driver', 'profile'}
+
+_SIZE_SUFFIXES = {'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}
+
+
+def parse_size(s):
+    """Parse a number of bytes, like '4096', '64M' or '1G'"""
+    s = str(s).strip().lower().rstrip('ib').rstrip('b')
+    if s and s[-1] in _SIZE_SUFFIXES:
+        return int(float(s[:-1]) * _SIZE_SUFFIXES[s[-1]])
+    return int(s)
+
+
+def _clean(settings, source):
+    res = {}
+    for k, v in settings.items():
+        k = k.strip().replace('-', '_')
+        if k not in SETTINGS:
+            raise ValueError("Unknown file open setting {!r} in {}".format(k, source))
+        res[k] = parse_size(v) if k in INT_SETTINGS else str(v).strip()
+    return res
+
+
+def config_path():
+    config_home = os.environ.get('XDG_CONFIG_HOME', '') \
+                  or os.path.expanduser('~/.config')
+    return Path(config_home, 'h5glance', 'config.ini')
+
+
+def read_config(path=None):
+    """Read (default settings, named profiles) from the config file"""
+    cp = configparser.ConfigParser()
+    cp.read(path or config_path())
+    defaults = _clean(cp['open'], 'config [open]') if 'open' in cp else {}
+    profiles = {
+        name[len('profile:'):]: _clean(cp[name], 'config [{}]'.format(name))
+        for name in cp.sections() if name.startswith('profile:')
+    }
+    return defaults, profiles
+
+
+def parse_env(value):
+    if not value:
+        return {}
+    pairs = [item.partition('=') for item in value.split(',') if item.strip()]
+    return _clean({k: v for k, _, v in pairs}, 'H5GLANCE_OPEN')
+
+
+def all_profiles(config_profiles=None):
+    if config_profiles is None:
+        config_profiles = read_config()[1]
+    return {**BUILTIN_PROFILES, **config_profiles}
+
+
+def resolve_settings(cli=None, env=None, config_file=None):
+    """Combine settings from all sources into h5py.File options"""
+    cfg_defaults, cfg_profiles = read_config(config_file)
+    if env is None:
+        env = os.environ.get('H5GLANCE_OPEN', '')
+    cli = _clean({k: v for k, v in (cli or {}).items() if v is not None},
+                 'command line options')
+    merged = {**cfg_defaults, **parse_env(env), **cli}
+
+    profile = merged.pop('profile', 'default')
+    profiles = all_profiles(cfg_profiles)
+    if profile not in profiles:
+        raise ValueError("Unknown open profile {!r} (available: {})".format(
+            profile, ', '.join(sorted(profiles))))
+    return {**profiles[profile], **merged}
+
+
+_current = None
+
+def configure(settings):
+    """Set the options used by :func:`open_file` when none are given"""
+    global _current
+    _current = dict(settings)
+
+
+def current_settings():
+    global _current
+    if _current is None:
+        _current = resolve_settings()
+    return _current
+
+
+# Settings which make sense for HDF5 files read through a Python file object
+REMOTE_SETTINGS = {'rdcc_nbytes', 'rdcc_nslots', 'mdc_size'}
+
+def open_file(path, settings=None):
+    """Open an HDF5 file read-only with the given (or configured) settings
+
+    *path* may also be an http(s) URL, to read a file with range requests.
+    """
+    if settings is None:
+        settings = current_settings()
+    kw = dict(settings)
+    if is_url(path):
+        kw = {k: v for k, v in kw.items() if k in REMOTE_SETTINGS}
+        path = remote.HTTPRangeFile(str(path))
+    mdc_size = kw.pop('mdc_size', None)
+    try:
+        f = h5py.File(path, 'r', **kw)
+    except (OSError, ValueError):
+        if 'page_buf_size' not in kw:
+            raise
+        # Older HDF5 refuses a page buffer for files without paged storage
+        del kw['page_buf_size']
+        f = h5py.File(path, 'r', **kw)
+
+    if mdc_size:
+        config = f.id.get_mdc_config()
+        config.set_initial_size = True
+        config.initial_size = mdc_size
+        config.max_size = max(config.max_size, mdc_size)
+        config.min_size = min(config.min_size, mdc_size)
+        f.id.set_mdc_config(config)
+    return f
+
+
+def _inspect(path, settings):
+    """The workload for benchmarks: open & walk the file like h5glance does"""
+    from .terminal import TreeViewBuilder
+    t0 = time.perf_counter()
+    with open_file(path, settings) as f:
+        TreeViewBuilder().object_node(f, str(path))
+    return time.perf_counter() - t0
+
+
+def benchmark(path, profiles=None, rounds=3):
+    """Time opening & walking a file with each profile
+
+    Returns a list of (profile name, median seconds), fastest first. Rounds
+    go through all the profiles in turn, so they all see a similarly warm
+    OS cache.
+    """
+    if profiles is None:
+        profiles = all_profiles()
+        if is_url(path) or os.path.getsize(path) > CORE_MAX_SIZE:
+            profiles = {k: v for k, v in profiles.items()
+                        if v.get('driver') != 'core'}
+    times = {name: [] for name in profiles}
+    for _ in range(rounds):
+        for name, settings in profiles.items():
+            try:
+                times[name].append(_inspect(path, settings))
+            except Exception:
+                times[name].append(float('inf'))
+    return sorted(((n, statistics.median(t)) for n, t in times.items()),
+                  key=lambda x: x[1])
@@ -0,0 +1,176 @@
+"""Read HDF5 files over HTTP(S) using range requests
+
+h5py can open a Python file-like object. :class:`HTTPRangeFile` provides
+one which fetches the parts of a remote file HDF5 asks for with HTTP range
+requests. Inspecting a file needs many small reads of metadata, so it
+keeps a cache of fixed size blocks, fetches runs of adjacent missing blocks
+in one request, and reads ahead: the start of the file (the superblock &
+usually the root group's metadata) when it's opened, and further ahead
+when reads continue sequentially.
+"""
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+import io
+import re
+import sys
+from urllib.request import Request, urlopen
+
+from .utils import fmt_bytes
+
+BLOCK_SIZE = 64 << 10
+CACHE_BLOCKS = 1024      # 64 MiB with the default block size
+INITIAL_READAHEAD = 1 << 20
+MAX_READAHEAD = 8 << 20
+
+
+class FetchStats:
+    """Count the HTTP requests made and the data they fetched"""
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+
+    def add(self, nbytes):
+        self.requests += 1
+        self.bytes += nbytes
+
+    def __str__(self):
+        return "Fetched {} in {} HTTP requests".format(
+            fmt_bytes(self.bytes), self.requests)
+
+
+# Totals for all remote files opened in this process
+total_stats = FetchStats()
+
+
+def print_stats(file=None):
+    if total_stats.requests:
+        print(total_stats, file=file or sys.stderr)
+
+
+def stat_url(url):
+    """Get (modification time in ns, size) for a URL with a HEAD request
+
+    The modification time is 0 if the server doesn't give one.
+    """
+    with urlopen(Request(url, method='HEAD')) as r:
+        size = r.headers.get('Content-Length')
+        modified = r.headers.get('Last-Modified')
+    if size is None:
+        # Some servers don't give a length for HEAD, so ask for 1 byte
+        with urlopen(Request(url, headers={'Range': 'bytes=0-0'})) as r:
+            m = re.search(r'/(\d+)', r.headers.get('Content-Range', ''))
+            if m is None:
+                raise OSError("Could not get the size of {}".format(url))
+            size = m[1]
+    mtime_ns = 0
+    if modified:
+        mtime_ns = int(parsedate_to_datetime(modified).timestamp()) * 10**9
+    return mtime_ns, int(size)
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """A read-only file-like object for a URL, read with range requests"""
+    def __init__(self, url, block_size=BLOCK_SIZE, cache_blocks=CACHE_BLOCKS,
+                 readahead=INITIAL_READAHEAD):
+        super().__init__()
+        self.url = url
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.mtime_ns, self.size = stat_url(url)
+        self.pos = 0
+        self.blocks = OrderedDict()  # block number -> bytes
+        self.stats = FetchStats()
+        self.hits = self.misses = 0
+        self._next_block = None      # Block after the last fetch
+        self._readahead = 1          # Extra blocks to fetch on a miss
+        if readahead and self.size:
+            self._fetch(0, (min(readahead, self.size) - 1) // block_size)
+
+    def __repr__(self):
+        # h5py uses this as the file's name
+        return self.url
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self.pos = offset
+        elif whence == io.SEEK_CUR:
+            self.pos += offset
+        elif whence == io.SEEK_END:
+            self.pos = self.size + offset
+        else:
+            raise ValueError("Invalid whence ({})".format(whence))
+        return self.pos
+
+    def _fetch(self, first, last):
+        """Fetch blocks first to last (inclusive) in one request"""
+        bs = self.block_size
+        last = min(last, (self.size - 1) // bs)
+        start, end = first * bs, min((last + 1) * bs, self.size) - 1
+        req = Request(self.url, headers={'Range': 'bytes={}-{}'.format(start, end)})
+        with urlopen(req) as r:
+            data = r.read()
+            if r.status != 206:  # Server ignored the range & sent everything
+                data = data[start:end + 1]
+        self.stats.add(len(data))
+        total_stats.add(len(data))
+
+        for i in range(first, last + 1):
+            self.blocks[i] = data[(i - first) * bs:(i - first + 1) * bs]
+            self.blocks.move_to_end(i)
+        while len(self.blocks) > self.cache_blocks:
+            self.blocks.popitem(last=False)
+        self._next_block = last + 1
+
+    def _fill(self, first, last):
+        """Make sure blocks first to last are in the cache"""
+        i = first
+        while i <= last:
+            if i in self.blocks:
+                self.hits += 1
+                self.blocks.move_to_end(i)
+                i += 1
+                continue
+            # Coalesce a run of missing blocks into one request
+            self.misses += 1
+            run_end = i
+            while run_end < last and (run_end + 1) not in self.blocks:
+                run_end += 1
+            # Read further ahead while reads continue sequentially
+            if i == self._next_block:
+                self._readahead = min(self._readahead * 2,
+                                      MAX_READAHEAD // self.block_size)
+            else:
+                self._readahead = 1
+            self._fetch(i, run_end + self._readahead)
+            i = run_end + 1
+
+    def readinto(self, b):
+        n = min(len(b), self.size - self.pos)
+        if n <= 0:
+            return 0
+        bs = self.block_size
+        first, last = self.pos // bs, (self.pos + n - 1) // bs
+        self._fill(first, last)
+
+        view = memoryview(b)
+        done = 0
+        for i in range(first, last + 1):
+            block = self.blocks.get(i)
+            if block is None:  # Dropped from a small cache while filling
+                self._fetch(i, i)
+                block = self.blocks[i]
+            lo = self.pos + done - i * bs
+            chunk = block[lo:lo + n - done]
+            view[done:done + len(chunk)] = chunk
+            done += len(chunk)
+        self.pos += done
+        return done
@@ -0,0 +1,140 @@
+"""Bounded, chunk-aligned sampling of HDF5 datasets
+
+Reading a few whole chunks spread over a dataset is much cheaper than a
+strided selection, which makes HDF5 decompress every chunk it touches.
+"""
+import math
+
+import numpy
+
+from .mapped import array_source
+
+DEFAULT_MAX_CHUNKS = 32
+
+# Size of the pseudo-chunks used to align reads for contiguous/compact data
+BLOCK_BYTES = 1 << 20
+
+
+def storage_chunks(ds, target_bytes=BLOCK_BYTES):
+    """The chunk shape to align reads to
+
+    This is the real chunk shape for chunked datasets. Other layouts are
+    split into blocks of roughly *target_bytes*, keeping the last axes whole
+    where possible, so that each block is a contiguous range in the file.
+    """
+    if ds.chunks:
+        return ds.chunks
+
+    block = list(ds.shape)
+    itemsize = ds.dtype.itemsize
+    for ax in range(len(block)):
+        rest = itemsize * math.prod(block[ax + 1:])
+        if rest * block[ax] <= target_bytes:
+            break
+        block[ax] = max(1, target_bytes // rest)
+    return tuple(max(n, 1) for n in block)
+
+
+def chunk_grid(shape, chunks):
+    """The number of chunks along each axis"""
+    return tuple(-(-n // c) for n, c in zip(shape, chunks))
+
+
+def chunk_selection(index, shape, chunks):
+    """Slices selecting the chunk at grid position *index*"""
+    return tuple(slice(i * c, min((i + 1) * c, n))
+                 for i, n, c in zip(index, shape, chunks))
+
+
+def spread_chunk_indices(grid, n, axis=None):
+    """Pick up to *n* chunk grid positions spread evenly over the dataset
+
+    With *axis* given, the chunks are spread evenly along that axis, while
+    the positions on the other axes move diagonally through the grid.
+    Otherwise, they are spread evenly over all chunks in C order.
+    """
+    if axis is None:
+        total = math.prod(grid)
+        lin = numpy.unique(numpy.linspace(0, total - 1, min(n, total),
+                                          dtype=numpy.int64))
+        return [tuple(int(i) for i in idx)
+                for idx in zip(*numpy.unravel_index(lin, grid))]
+
+    count = min(n, grid[axis])
+    fracs = numpy.linspace(0, 1, count) if count > 1 else numpy.zeros(1)
+    res = []
+    for f in fracs:
+        res.append(tuple(min(int(f * g), g - 1) for g in grid))
+    return res
+
+
+class ChunkSampler:
+    """Read a bounded number of whole chunks from a dataset
+
+    Chunks which have already been read are kept, so the different summaries
+    below can share the same reads.
+    """
+    def __init__(self, ds, max_chunks=DEFAULT_MAX_CHUNKS):
+        self.ds = ds
+        self.source = array_source(ds)
+        self.max_chunks = max_chunks
+        self.chunks = storage_chunks(ds)
+        self.grid = chunk_grid(ds.shape, self.chunks)
+        self.cache = {}
+
+    @property
+    def nchunks(self):
+        return math.prod(self.grid)
+
+    def read(self, index):
+        if index not in self.cache:
+            sel = chunk_selection(index, self.ds.shape, self.chunks)
+            self.cache[index] = (sel, numpy.asarray(self.source[sel]))
+        return self.cache[index]
+
+    def sample(self, axis=None):
+        """Get (selection, array) pairs for chunks spread over the dataset"""
+        return [self.read(ix) for ix in
+                spread_chunk_indices(self.grid, self.max_chunks, axis)]
+
+    def profile(self, axis, width):
+        """Mean values along one axis, for drawing at up to *width* columns
+
+        If every chunk along the axis is read, columns are evenly spaced
+        positions, and those with no data are NaN. Otherwise, each sampled
+        chunk gives one column.
+        """
+        n = self.ds.shape[axis]
+        samples = self.sample(axis)
+        covered = len(samples) >= self.grid[axis]
+        width = min(width, n) if covered else len(samples)
+        sums = numpy.zeros(width)
+        counts = numpy.zeros(width)
+        for i, (sel, arr) in enumerate(samples):
+            other = tuple(a for a in range(arr.ndim) if a != axis)
+            means = arr.mean(axis=other, dtype=numpy.float64) if other \
+                else arr.astype(numpy.float64)
+            if covered:
+                pos = numpy.arange(sel[axis].start, sel[axis].stop)
+                numpy.add.at(sums, pos * width // n, means)
+                numpy.add.at(counts, pos * width // n, 1)
+            else:
+                sums[i] = means.mean()
+                counts[i] = 1
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            return sums / counts
+
+    def histogram(self, bins):
+        """Histogram of the values in all chunks read so far
+
+        If nothing has been read yet, sample chunks over the whole dataset.
+        """
+        if not self.cache:
+            self.sample()
+        values = numpy.concatenate([
+            arr.ravel() for _, arr in self.cache.values()
+        ]).astype(numpy.float64)
+        values = values[numpy.isfinite(values)]
+        if values.size == 0:
+            return numpy.zeros(0), numpy.zeros(1)
+        return numpy.histogram(values, bins=bins)
@@ -0,0 +1,71 @@
+"""Parse selections given on the command line, and read them in blocks
+"""
+import math
+
+import numpy
+
+from .mapped import array_source
+
+BLOCK_BYTES = 4 << 20
+
+
+class _IndexCapture:
+    def __getitem__(self, index):
+        return index
+
+
+def parse_slice_expr(slice_expr):
+    """Turn a string like '0, 100:110' into an index tuple
+
+    This accepts Python slicing & indexing syntax, as for a numpy array.
+    """
+    index = eval('_[{}]'.format(slice_expr), {'_': _IndexCapture()})
+    if not isinstance(index, tuple):
+        index = (index,)
+    return index
+
+
+def _first_axis_range(index, shape):
+    """The range of the first axis selected by index, if it's a simple slice"""
+    if not shape or not index or not isinstance(index[0], slice):
+        return None
+    r = range(*index[0].indices(shape[0]))
+    if r.step < 1:
+        return None  # h5py doesn't support reverse slicing
+    return r
+
+
+def can_read_in_blocks(index, shape):
+    return _first_axis_range(index, shape) is not None
+
+
+def iter_blocks(ds, index, block_bytes=BLOCK_BYTES, first_rows=None):
+    """Read a selection from a dataset in blocks along the first axis
+
+    Yields numpy arrays which, concatenated along axis 0, make up
+    ``ds[index]``. *first_rows* can make the first block smaller, so some
+    data is available quickly. The index must start with a slice (see
+    :func:`can_read_in_blocks`); other selections are read in one go.
+    """
+    src = array_source(ds)
+    r = _first_axis_range(index, ds.shape)
+    if r is None:
+        yield numpy.asarray(src[index])
+        return
+
+    row_bytes = ds.dtype.itemsize * math.prod(ds.shape[1:])
+    rows = max(1, block_bytes // max(row_bytes, 1))
+    rest = index[1:]
+
+    if len(r) == 0:
+        yield numpy.asarray(src[(slice(0, 0),) + rest])
+        return
+
+    start = 0
+    nrows = min(rows, first_rows) if first_rows else rows
+    while start < len(r):
+        sub = r[start:start + nrows]
+        sel = slice(sub.start, sub[-1] + 1, r.step)
+        yield numpy.asarray(src[(sel,) + rest])
+        start += nrows
+        nrows = rows
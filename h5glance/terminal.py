@@ -1,19 +1,24 @@
 """Terminal h5glance interface for inspecting HDF5 files
 """
-import argparse
+import atexit
 import h5py
 import h5py.h5o
 import io
+import itertools
 import os
 import numpy
-from pathlib import Path
-import shlex
 from shutil import get_terminal_size
-from subprocess import run
 import sys
 
+from .cli import main  # noqa: F401 (the entry point used to be here)
 from .datatypes import fmt_dtype
-from .utils import fmt_shape
+from .mapped import read
+from . import profiles, remote
+from .paths import is_url
+from .profiles import open_file
+from .sampling import ChunkSampler
+from .selection import iter_blocks, parse_slice_expr
+from .utils import fmt_shape, head_tail_members
 
 layout_names = {
     h5py.h5d.COMPACT: 'Compact',
@@ -49,8 +54,194 @@ def fmt_attr(key, attrs):
     # >= 2 dims
     return 'array [{}: {}]'.format(fmt_dtype(hdf_dt), shape)
 
+SPARK_CHARS = ' ▁▂▃▄▅▆▇█'
 
-def print_dataset_info(ds: h5py.Dataset, slice_expr=None, file=None):
+def fmt_sparkline(values, lo=None):
+    """Draw a sequence of numbers as a line of Unicode block characters
+
+    The scale runs from the minimum (or *lo*) to the maximum value.
+    NaN values (no data) are shown as blank spaces.
+    """
+    values = numpy.asarray(values, dtype=numpy.float64)
+    finite = numpy.isfinite(values)
+    if not finite.any():
+        return ' ' * len(values)
+    hi = values[finite].max()
+    if lo is None:
+        lo = values[finite].min()
+    span = (hi - lo) or 1
+    chars = []
+    for v, ok in zip(values, finite):
+        if not ok:
+            chars.append(' ')
+        else:
+            chars.append(SPARK_CHARS[1 + int((v - lo) / span * 7.999)])
+    return ''.join(chars)
+
+def print_data_preview(ds, max_chunks=32, width=60, file=None):
+    """Print sparklines summarising a decimated sample of a dataset
+
+    At most *max_chunks* chunks are read in total, spread evenly over the
+    dataset, and shared between the lines for different axes.
+    """
+    if ds.dtype.kind not in 'uifb' or not ds.ndim or not ds.size:
+        return
+    axes = list(range(ds.ndim)) if ds.ndim <= 2 else [0]
+    if max_chunks < len(axes):
+        axes = axes[:1]
+    sampler = ChunkSampler(ds, max_chunks=max_chunks // len(axes))
+    lines = []
+    for axis in axes:
+        prof = sampler.profile(axis, width)
+        finite = prof[numpy.isfinite(prof)]
+        if finite.size == 0:
+            continue
+        label = 'values' if ds.ndim == 1 else 'axis {} mean'.format(axis)
+        lines.append('{:>12}: {}  [{} .. {}]'.format(
+            label, fmt_sparkline(prof),
+            '{:.4g}'.format(finite.min()), '{:.4g}'.format(finite.max())
+        ))
+    counts, edges = sampler.histogram(min(width, 40))
+    if counts.size:
+        lines.append('{:>12}: {}  [{} .. {}]'.format(
+            'histogram', fmt_sparkline(numpy.where(counts, counts, numpy.nan),
+                                       lo=0),
+            '{:.4g}'.format(edges[0]), '{:.4g}'.format(edges[-1])
+        ))
+
+    if lines:
+        print('\npreview ({} of {} chunks sampled):'.format(
+            len(sampler.cache), sampler.nchunks), file=file)
+        for line in lines:
+            print(line, file=file)
+
+
+class ElementFormatter:
+    """Format numbers to consistent widths across several arrays
+
+    The format is chosen from the values in *arr*, so an array printed in
+    pieces along its first axis lines up as it would if printed in one go.
+    Floats are aligned on the decimal point, like numpy does.
+    """
+    def __init__(self, arr):
+        self.kind = arr.dtype.kind
+        self.precision = numpy.get_printoptions()['precision']
+        self.sci = False
+        if self.kind == 'f':
+            finite = numpy.abs(arr[numpy.isfinite(arr)])
+            nonzero = finite[finite != 0]
+            # Similar rules to numpy for switching to scientific notation
+            self.sci = bool(nonzero.size) and (
+                nonzero.max() >= 1e8 or nonzero.min() < 1e-4
+                or nonzero.max() / nonzero.min() > 1e3
+            )
+        self.pad_left = self.pad_right = self.exp_len = 0
+        self.update(arr)
+
+    @classmethod
+    def for_array(cls, arr):
+        if arr.dtype.kind not in 'biuf' or arr.size == 0:
+            return None
+        return cls(arr)
+
+    def _fmt(self, x, pad_left=0, pad_right=0):
+        if self.kind == 'b':
+            return str(bool(x)).rjust(5)  # numpy pads True to match False
+        if self.kind != 'f':
+            return str(x).rjust(pad_left)
+        if self.sci:
+            s = numpy.format_float_scientific(
+                x, precision=self.precision, unique=True, trim='.')
+        else:
+            s = numpy.format_float_positional(
+                x, precision=self.precision, unique=True, trim='.')
+        mantissa, e, exponent = s.partition('e')
+        left, dot, right = mantissa.partition('.')
+        # numpy pads scientific notation with zeros, positional with spaces
+        right = right.ljust(pad_right, '0' if self.sci else ' ')
+        return left.rjust(pad_left) + dot + right + e + exponent
+
+    def update(self, arr):
+        """Widen the format if needed for the values in arr"""
+        for x in arr.flat:
+            if self.kind == 'f' and not numpy.isfinite(x):
+                continue  # Handled separately in __call__
+            s = self._fmt(x)
+            if self.kind == 'f':
+                mantissa, e, exponent = s.partition('e')
+                left, _, right = mantissa.partition('.')
+                self.pad_left = max(self.pad_left, len(left))
+                self.pad_right = max(self.pad_right, len(right))
+                self.exp_len = max(self.exp_len, len(e + exponent))
+            else:
+                self.pad_left = max(self.pad_left, len(s))
+
+    def __call__(self, x):
+        if self.kind == 'f' and not numpy.isfinite(x):
+            width = self.pad_left + 1 + self.pad_right + self.exp_len
+            return str(x).rjust(max(width, self.pad_left))
+        return self._fmt(x, self.pad_left, self.pad_right)
+
+# Blocks are read ahead up to this size to settle the number format
+FORMAT_SAMPLE_BYTES = 4 << 20
+
+def print_blocks(first, blocks, file=None):
+    """Print an array which arrives in blocks along its first axis
+
+    Blocks are read ahead up to FORMAT_SAMPLE_BYTES to pick one number
+    format for all of them, so a selection up to that size prints exactly
+    like the whole array. Each block is then written separately, so output
+    for bigger selections starts before all the data has been read.
+    """
+    if first.ndim == 0:
+        print(first, file=file)
+        return
+
+    blocks = iter(blocks)
+    sample, nbytes = [first], first.nbytes
+    for arr in blocks:
+        sample.append(arr)
+        nbytes += arr.nbytes
+        if nbytes >= FORMAT_SAMPLE_BYTES:
+            break
+    fmt = ElementFormatter.for_array(numpy.concatenate(sample))
+    arrays = itertools.chain(sample, blocks)
+    file = file or sys.stdout
+    if first.ndim == 1:
+        return print_1d_blocks(arrays, fmt, file)
+
+    kw = {'formatter': {'all': fmt}} if fmt else {}
+    sep = '\n' * (first.ndim - 1) + ' '
+    printed = False
+    for arr in arrays:
+        if arr.shape[0] == 0 and printed:
+            continue
+        inner = numpy.array2string(arr, separator=' ', **kw)[1:-1]
+        file.write((sep if printed else '[') + inner)
+        printed = True
+    file.write(']\n')
+
+def print_1d_blocks(arrays, fmt, file):
+    """Print a 1D array in blocks, wrapping lines as numpy does"""
+    if fmt is None:
+        def fmt(x):
+            return numpy.array2string(numpy.asarray(x))
+    width = numpy.get_printoptions()['linewidth'] - 1  # Room for ']'
+    line = '['
+    for arr in arrays:
+        for x in arr:
+            word = fmt(x)
+            if line not in '[ ':
+                line += ' '
+                if len(line) + len(word) > width:
+                    file.write(line.rstrip() + '\n')
+                    line = ' '
+            line += word
+    file.write(line + ']\n')
+
+
+def print_dataset_info(ds: h5py.Dataset, slice_expr=None, file=None,
+                       preview=True):
     """Print detailed information for an HDF5 dataset."""
     print('      dtype:', fmt_dtype(ds.id.get_type()), file=file)
     print('      shape:', fmt_shape(ds.shape), file=file)
@@ -70,22 +261,30 @@ def print_dataset_info(ds: h5py.Dataset, slice_expr=None, file=None):
     if slice_expr:
         print("\nselected data [{}]:".format(slice_expr), file=file)
         try:
-            arr = eval('ds[{}]'.format(slice_expr), {'ds': ds})
+            index = parse_slice_expr(slice_expr)
+            blocks = iter_blocks(ds, index, first_rows=100)
+            first = next(blocks)
         except Exception as e:
             print("Error slicing", e, file=file)
         else:
-            print(arr, file=file)
+            print_blocks(first, blocks, file=file)
     elif ds.size and ds.size > 0:  # size is None for empty datasets
         if ds.ndim == 0:
             print('\ndata:', file=file)
             print(ds[()], file=file)
         elif ds.ndim == 1:
             print('\nsample data:', file=file)
-            print(ds[:10], file=file)
+            print(read(ds, slice(0, 10)), file=file)
         else:
             select = (0,) * (ds.ndim - 2) + (slice(0, 10),) * 2
             print('\nsample data:', file=file)
-            print(ds[select], file=file)
+            print(read(ds, select), file=file)
+
+    if preview and not slice_expr:
+        try:
+            print_data_preview(ds, file=file)
+        except Exception as e:  # e.g. a corrupt chunk; still show the rest
+            print('\npreview unavailable:', e, file=file)
 
     print('\n{} attributes:'.format(len(ds.attrs)), file=file)
     for k in ds.attrs:
@@ -114,10 +313,16 @@ def use_colors():
 class TreeViewBuilder:
     """Build a tree view of an HDF5 group or file
 
-    The tree nodes are tuples (line, children).
+    The tree nodes are tuples (line, children). With *max_children*, large
+    groups show only their first & last members. Pass an
+    :class:`~.external.ExternalLinks` object as *external* to show the
+    targets of external links.
     """
-    def __init__(self, expand_attrs=False):
+    def __init__(self, expand_attrs=False, max_children=None, external=None):
         self.expand_attrs = expand_attrs
+        self.max_children = max_children
+        self.external = external
+        self._realpaths = {}
         if use_colors():
             self.colors = ColorsDefault
         else:
@@ -135,15 +340,18 @@ class TreeViewBuilder:
         else:
             color_start = ''
 
-        obj_id = h5py.h5o.get_info(obj.id).addr
+        obj_id = self.object_key(obj)
+        label = color_start + name + color_stop
 
         if obj_id in self.visited:
             # Hardlink to an object we've seen before
-            first_link = self.visited[obj_id]
-            return (color_start + name + color_stop + '\t= ' + first_link), []
+            return self.duplicate_node(label, obj_id)
 
         # An object we haven't seen before
-        self.visited[obj_id] = obj.name
+        if self.external is None:
+            self.visited[obj_id] = obj.name
+        else:
+            self.visited[obj_id] = obj_id[0] + obj.name
 
         children = []
         detail = attr_detail = ''
@@ -163,14 +371,32 @@ class TreeViewBuilder:
                 detail += ' virtual'
         elif isinstance(obj, h5py.Group):
             if max_depth >= 1:
+                head, n_hidden, tail = head_tail_members(obj, self.max_children)
+                if self.external is not None:
+                    # Look for the files these links point to in parallel
+                    links = [obj.get(k, getlink=True) for k in head + tail]
+                    self.external.check((obj, l) for l in links
+                                        if isinstance(l, h5py.ExternalLink))
+                children += [self.group_item_node(obj, key, max_depth - 1)
+                             for key in head]
+                if n_hidden:
+                    children.append(('… {} more'.format(n_hidden), []))
                 children += [self.group_item_node(obj, key, max_depth - 1)
-                             for key in obj]
+                             for key in tail]
             else:
                 detail = f'\t({len(obj)} children)'
         else:
             detail = ' (unknown h5py type)'
 
-        return (color_start + name + color_stop + detail + attr_detail), children
+        return self.new_node(label, detail + attr_detail, children, obj_id)
+
+    def duplicate_node(self, label, obj_id):
+        """Build a tree node for a hard link to an object already shown"""
+        return (label + '\t= ' + self.visited[obj_id]), []
+
+    def new_node(self, label, details, children, obj_id):
+        """Build a tree node for an object shown for the first time"""
+        return (label + details), children
 
     def group_item_node(self, group, key, max_depth=numpy.inf):
         """Build a tree node for one key in a group"""
@@ -179,6 +405,8 @@ class TreeViewBuilder:
             target = link.path
         elif isinstance(link, h5py.ExternalLink):
             target = '{}/{}'.format(link.filename, link.path)
+            if self.external is not None:
+                return self.external_node(group, key, link, target, max_depth)
         else:
             return self.object_node(group[key], key, max_depth=max_depth)
 
@@ -186,6 +414,33 @@ class TreeViewBuilder:
             self.colors.link, key, self.colors.reset, target)
         return line, []
 
+    def external_node(self, group, key, link, target, max_depth=numpy.inf):
+        """Build a tree node for the target of an external link"""
+        path, obj, error = self.external.follow(group, link)
+        if obj is None:
+            line = '{}{}{}\t-> {} ({})'.format(
+                self.colors.link, key, self.colors.reset, target, error)
+            return line, []
+        try:
+            return self.object_node(obj, '{} -> {}'.format(key, target),
+                                    max_depth=max_depth)
+        finally:
+            self.external.release(path)
+
+    def object_key(self, obj):
+        """Identify an object, to spot when we reach it again
+
+        When following external links, this includes the file, as well as
+        the object's address within it.
+        """
+        addr = h5py.h5o.get_info(obj.id).addr
+        if self.external is None:
+            return addr
+        filename = obj.file.filename
+        if filename not in self._realpaths:
+            self._realpaths[filename] = os.path.realpath(filename)
+        return self._realpaths[filename], addr
+
 def attrs_tree_nodes(obj):
     """Build tree nodes for attributes"""
     nattr = len(obj.attrs)
@@ -212,28 +467,75 @@ def print_tree(node, prefix1='', prefix2='', file=None):
         c_prefix2 = prefix2 + ('  ' if islast else '│ ')
         print_tree(node, prefix1=c_prefix1, prefix2=c_prefix2, file=file)
 
-def group_to_str(grp: h5py.Group, expand_attrs=False, max_depth=1):
+def group_to_str(grp: h5py.Group, expand_attrs=False, max_depth=1,
+                 max_children=None):
     sio = io.StringIO()
-    tvb = TreeViewBuilder(expand_attrs=expand_attrs)
+    tvb = TreeViewBuilder(expand_attrs=expand_attrs, max_children=max_children)
     root = grp.file.filename + '/' + grp.name.lstrip('/')
     print_tree(tvb.object_node(grp, root, max_depth=max_depth), file=sio)
     return sio.getvalue()
 
+def pager_command():
+    import shlex
+    return shlex.split(os.environ.get('PAGER') or 'less -r')
+
 def page(text):
     """Display text in a terminal pager
 
     Respects the PAGER environment variable if set.
     """
-    pager_cmd = shlex.split(os.environ.get('PAGER') or 'less -r')
-    run(pager_cmd, input=text.encode('utf-8'))
+    import subprocess
+    subprocess.run(pager_command(), input=text.encode('utf-8'))
+
+class LazyPager:
+    """Text output which starts a pager once it's longer than the terminal
+
+    Output is held until it fills the terminal, then the pager is started
+    and everything after that is passed to it as it's written. If the output
+    ends before filling the terminal, it's printed normally.
+    """
+    def __init__(self):
+        self.max_lines = get_terminal_size()[1]
+        self.buffer = []
+        self.nlines = 0
+        self.proc = None
+
+    def write(self, text):
+        if self.proc is not None:
+            self.proc.stdin.write(text.encode('utf-8'))
+            return
+        self.buffer.append(text)
+        self.nlines += text.count('\n')
+        if self.nlines > self.max_lines:
+            import subprocess
+            self.proc = subprocess.Popen(pager_command(), stdin=subprocess.PIPE)
+            self.write(''.join(self.buffer))
+            self.buffer = []
+
+    def flush(self):
+        if self.proc is not None:
+            self.proc.stdin.flush()
+
+    def close(self):
+        if self.proc is None:
+            sys.stdout.write(''.join(self.buffer))
+            return
+        try:
+            self.proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.proc.wait()
 
 def display_h5_obj(file: h5py.File, path=None, expand_attrs=False, slice_expr=None,
-                   max_depth=numpy.inf, use_pager=True):
+                   max_depth=numpy.inf, use_pager=True, preview=True,
+                   max_children=None, follow_external=False, jobs=None):
     """Display information on an HDF5 file, group or dataset
 
     This is the central function for the h5glance command line tool.
+    Output is written as it's produced, through a pager if it's longer than
+    the terminal. With *jobs* > 1, the tree of a group is built in that many
+    worker processes.
     """
-    sio = io.StringIO()
     if path:
         root = file.filename + '/' + path.lstrip('/')
         obj = file[path]
@@ -244,17 +546,40 @@ def display_h5_obj(file: h5py.File, path=None, expand_attrs=False, slice_expr=No
     if isinstance(obj, h5py.Group):
         if slice_expr is not None:
             sys.exit("Slicing is only allowed for datasets")
-        tvb = TreeViewBuilder(expand_attrs=expand_attrs)
-        print_tree(tvb.object_node(obj, root, max_depth=max_depth), file=sio)
-    elif isinstance(obj, h5py.Dataset):
-        print(root, file=sio)
-        print_dataset_info(obj, slice_expr, file=sio)
-    else:
+    elif not isinstance(obj, h5py.Dataset):
         sys.exit("What is this? " + repr(obj))
 
-    output = sio.getvalue()
-
-    # If the output has more lines than the terminal, display it in a pager
+    use_pager = use_pager and sys.stdout.isatty()
+    out = LazyPager() if use_pager else sys.stdout
+    external = None
+    if follow_external:
+        from .external import ExternalLinks
+        external = ExternalLinks()
+    try:
+        if isinstance(obj, h5py.Group) and jobs and jobs > 1 and not external:
+            from .walk import parallel_tree
+            print_tree(parallel_tree(
+                file.filename, obj, root, jobs=jobs, max_depth=max_depth,
+                expand_attrs=expand_attrs, max_children=max_children,
+            ), file=out)
+        elif isinstance(obj, h5py.Group):
+            tvb = TreeViewBuilder(expand_attrs=expand_attrs,
+                                  max_children=max_children, external=external)
+            print_tree(tvb.object_node(obj, root, max_depth=max_depth), file=out)
+        else:
+            print(root, file=out)
+            print_dataset_info(obj, slice_expr, file=out, preview=preview)
+        print(file=out)
+    except BrokenPipeError:
+        pass  # The pager was closed before reading everything
+    finally:
+        if external is not None:
+            external.close()
+        if use_pager:
+            out.close()
+
+def show_output(output, use_pager=True):
+    """Print output, using a pager if it's longer than the terminal"""
     if use_pager and sys.stdout.isatty():
         nlines = len(output.splitlines())
         _, term_lines = get_terminal_size()
@@ -298,7 +623,7 @@ class H5Completer:
 def prompt_for_path(filename):
     """Prompt the user for a path inside the HDF5 file"""
     import readline
-    with h5py.File(filename, 'r') as f:
+    with open_file(filename) as f:
         compl = H5Completer(f)
         readline.set_completer(compl.rlcomplete)
         readline.set_completer_delims('')
@@ -311,43 +636,107 @@ def prompt_for_path(filename):
             print("No object at", repr(res))
 
 
-def main(argv=None):
-    from . import __version__
-    ap = argparse.ArgumentParser(prog="h5glance",
-             description="View HDF5 file structure in the terminal")
-    ap.add_argument("file", help="HDF5 file to view", type=Path)
-    ap.add_argument("path", nargs='?',
-        help="Object to show within the file, or '-' to prompt for a name"
-    )
-    ap.add_argument('--attrs', action='store_true',
-        help="Show attributes of groups",
-    )
-    ap.add_argument('--pager', action=argparse.BooleanOptionalAction,
-        default=True,
-        help="Use a pager to display output if it is too long (default: on)",
-    )
-    ap.add_argument('-d', '--depth', default=numpy.inf, type=float,
-        help='Show group children only up to a certain depth, all by default.')
-    ap.add_argument('-s', '--slice',
-        help="Select part of a dataset to examine, using Python slicing and "
-             "indexing as for a numpy array, e.g. 0,100:110",
-    )
-    ap.add_argument('--version', action='version',
-                    version='h5glance {}'.format(__version__))
-
-    args = ap.parse_args(argv)
-
-    if not args.file.is_file():
+def save_dataset(filename, path, slice_expr, out_path):
+    from .export import export_selection
+    from .utils import fmt_bytes
+    with open_file(filename) as f:
+        ds = f.get(path or '/')
+        if not isinstance(ds, h5py.Dataset):
+            sys.exit("--save needs the path of a dataset")
+        try:
+            index = parse_slice_expr(slice_expr) if slice_expr else ()
+        except Exception as e:
+            sys.exit("Error slicing: {}".format(e))
+        try:
+            nbytes = export_selection(ds, index, out_path)
+        except ValueError as e:
+            sys.exit(str(e))
+    print("Saved {} to {}".format(fmt_bytes(nbytes), out_path))
+
+def show_compression_trial(filename, path, jobs=None):
+    from .compression import try_compression, print_trial_report
+    with open_file(filename) as f:
+        if not isinstance(f.get(path or '/'), h5py.Dataset):
+            sys.exit("--try-compression needs the path of a dataset")
+    try:
+        report = try_compression(filename, path, jobs=jobs)
+    except ValueError as e:
+        sys.exit(str(e))
+    print_trial_report(report)
+
+def show_open_benchmark(filename):
+    print("Timing opening & walking {} with each profile...".format(filename))
+    results = profiles.benchmark(filename)
+    for name, secs in results:
+        print("  {:<12} {:8.1f} ms".format(name, secs * 1000))
+    print("Fastest:", results[0][0])
+
+def show_aggregate(pattern, path=None, jobs=None, use_pager=True):
+    from .aggregate import find_files, read_structures, print_aggregate
+    filenames = find_files(pattern)
+    if not filenames:
+        print("No files found:", pattern)
+        sys.exit(2)
+    structures = read_structures(filenames, path, jobs=jobs)
+    colors = ColorsDefault if use_colors() else ColorsNone
+    sio = io.StringIO()
+    print_aggregate(structures, colors, file=sio)
+    show_output(sio.getvalue(), use_pager)
+
+
+def run(args):
+    """Run the h5glance command with parsed arguments (see .cli)"""
+
+    try:
+        profiles.configure(profiles.resolve_settings(cli={
+            'profile': args.open_profile,
+            'rdcc_nbytes': args.rdcc_nbytes,
+            'rdcc_nslots': args.rdcc_nslots,
+            'page_buf_size': args.page_buf_size,
+            'mdc_size': args.mdc_size,
+        }))
+    except ValueError as e:
+        sys.exit(str(e))
+
+    if args.aggregate:
+        return show_aggregate(str(args.file), args.path, jobs=args.jobs,
+                              use_pager=args.pager)
+
+    if is_url(args.file):
+        atexit.register(remote.print_stats)
+    elif not args.file.is_file():
         print("Not a file:", args.file)
         sys.exit(2)
     elif not h5py.is_hdf5(args.file):
         print("Not an HDF5 file:", args.file)
         sys.exit(2)
 
+    if args.verify:
+        from .verify import verify_file, print_report
+        result = verify_file(args.file, args.path, jobs=args.jobs)
+        print_report(result)
+        sys.exit(1 if result.problems else 0)
+
+    if args.benchmark_open:
+        return show_open_benchmark(args.file)
+
     path = args.path
     if path == '-':
         path = prompt_for_path(args.file)
 
-    with h5py.File(args.file, 'r') as f:
+    if args.browse:
+        from .browse import browse
+        with open_file(args.file) as f:
+            return browse(f, path)
+
+    if args.try_compression:
+        return show_compression_trial(args.file, path, jobs=args.jobs)
+
+    if args.save:
+        return save_dataset(args.file, path, args.slice, args.save)
+
+    with open_file(args.file) as f:
         display_h5_obj(f, path, slice_expr=args.slice, expand_attrs=args.attrs,
-                       max_depth=args.depth, use_pager=args.pager)
+                       max_depth=args.depth, use_pager=args.pager,
+                       preview=args.preview, max_children=args.max_children,
+                       follow_external=args.follow_external, jobs=args.jobs)
@@ -0,0 +1,230 @@
+"""Small PNG thumbnails of 2D images & image stacks for the HTML view
+"""
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import math
+import os
+from pathlib import Path
+import struct
+import zlib
+
+import h5py
+import numpy
+
+from .mapped import array_source
+from .profiles import open_file
+from .sampling import chunk_grid, chunk_selection
+
+THUMBNAIL_SIZE = 64
+MAX_READ_BYTES = 16 << 20
+
+
+def is_image_dataset(ds):
+    """Is this a 2D image, or a stack of images, of numbers?"""
+    return (ds.ndim in (2, 3) and ds.dtype.kind in 'uifb'
+            and min(ds.shape[-2:]) >= 8)
+
+
+def _shrink(arr, f):
+    """Shrink a 2D array by a factor f, averaging f x f blocks
+
+    An axis shorter than f is averaged down to length 1.
+    """
+    fy, fx = min(f, arr.shape[0]), min(f, arr.shape[1])
+    if fy * fx <= 1:
+        return arr
+    h, w = (arr.shape[0] // fy) * fy, (arr.shape[1] // fx) * fx
+    return arr[:h, :w].reshape(h // fy, fy, w // fx, fx).mean(axis=(1, 3))
+
+
+def _block_mean(arr, size):
+    """Shrink a 2D array to at most size x size by averaging blocks"""
+    return _shrink(arr, math.ceil(max(arr.shape) / size))
+
+
+def _strided(src, lead, h, w, size):
+    sy, sx = math.ceil(h / size), math.ceil(w / size)
+    return src[lead + (slice(None, None, sy), slice(None, None, sx))]\
+        .astype(numpy.float64)
+
+
+def thumbnail_array(ds, size=THUMBNAIL_SIZE, max_read=MAX_READ_BYTES):
+    """Read a decimated 2D view of an image dataset
+
+    For image stacks, the middle frame is used. Frames smaller than
+    *max_read* bytes are read whole and averaged down. For larger frames,
+    chunked datasets are represented by an evenly spaced grid of chunks,
+    reading no more than *max_read* bytes of chunks, each averaged down to
+    its share of the thumbnail. Contiguous datasets, and those with chunks
+    bigger than *max_read*, are read with a stride.
+    """
+    lead = (ds.shape[0] // 2,) if ds.ndim == 3 else ()
+    h, w = ds.shape[-2:]
+    itemsize = ds.dtype.itemsize
+    src = array_source(ds)
+
+    if h * w * itemsize <= max_read:
+        return _block_mean(src[lead].astype(numpy.float64), size)
+
+    chunk_bytes = itemsize * math.prod(ds.chunks or ())
+    if not ds.chunks or chunk_bytes > max_read:
+        return _strided(src, lead, h, w, size)
+
+    chunks = ds.chunks[-2:]
+    gh, gw = chunk_grid((h, w), chunks)
+    budget = max_read // chunk_bytes
+    nr, nc = min(gh, size), min(gw, size)
+    if nr * nc > budget:
+        scale = math.sqrt(budget / (nr * nc))
+        nr, nc = max(1, int(nr * scale)), max(1, int(nc * scale))
+        nr = min(nr, budget)
+        nc = min(nc, budget // nr)
+    rows = numpy.unique(numpy.linspace(0, gh - 1, nr, dtype=numpy.int64))
+    cols = numpy.unique(numpy.linspace(0, gw - 1, nc, dtype=numpy.int64))
+
+    # The chosen chunks are put side by side, so the factor to shrink each
+    # one by depends on how big they are together.
+    sels = [[chunk_selection((r, c), (h, w), chunks) for c in cols]
+            for r in rows]
+    mosaic_h = sum(row[0][0].stop - row[0][0].start for row in sels)
+    mosaic_w = sum(c.stop - c.start for _, c in sels[0])
+    f = math.ceil(max(mosaic_h, mosaic_w) / size)
+    return numpy.block([
+        [_shrink(ds[lead + sel].astype(numpy.float64), f) for sel in row]
+        for row in sels
+    ])
+
+
+def to_uint8(arr):
+    """Scale an array to 0-255, clipping outliers"""
+    finite = arr[numpy.isfinite(arr)]
+    if finite.size == 0:
+        return numpy.zeros(arr.shape, dtype=numpy.uint8)
+    lo, hi = numpy.percentile(finite, [0.5, 99.5])
+    scaled = (numpy.nan_to_num(arr, nan=lo) - lo) / ((hi - lo) or 1)
+    return (numpy.clip(scaled, 0, 1) * 255).astype(numpy.uint8)
+
+
+def _png_chunk(tag, data):
+    return (struct.pack('>I', len(data)) + tag + data
+            + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+
+def encode_png(img):
+    """Encode a 2D uint8 array as a greyscale PNG image"""
+    h, w = img.shape
+    # Each row starts with a filter type byte (0: no filter)
+    rows = numpy.zeros((h, w + 1), dtype=numpy.uint8)
+    rows[:, 1:] = img
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 0, 0, 0, 0)),
+        _png_chunk(b'IDAT', zlib.compress(rows.tobytes())),
+        _png_chunk(b'IEND', b''),
+    ])
+
+
+def make_thumbnail(ds, size=THUMBNAIL_SIZE, max_read=MAX_READ_BYTES):
+    """Make PNG data for a dataset, or return None if that's not possible"""
+    if not is_image_dataset(ds):
+        return None
+    try:
+        return encode_png(to_uint8(thumbnail_array(ds, size, max_read)))
+    except Exception:
+        return None
+
+
+def default_cache_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME', '') \
+                 or os.path.expanduser('~/.cache')
+    return Path(cache_home, 'h5glance', 'thumbnails')
+
+
+class ThumbnailCache:
+    """Thumbnails stored on disk, keyed by file identity and dataset path
+
+    The file identity includes its size and modification time, so entries
+    for a file which has been modified are not used.
+    """
+    def __init__(self, directory=None):
+        self.directory = Path(directory or default_cache_dir())
+
+    def key(self, filename, path, *params):
+        st = os.stat(filename)
+        ident = repr((os.path.realpath(filename), st.st_ino, st.st_size,
+                      st.st_mtime_ns, path) + params)
+        return hashlib.sha1(ident.encode('utf-8')).hexdigest()
+
+    def _file(self, key):
+        return self.directory / key[:2] / (key[2:] + '.png')
+
+    def get(self, key):
+        """Get PNG data (b'' if no thumbnail), or None if not cached"""
+        try:
+            return self._file(key).read_bytes()
+        except OSError:
+            return None
+
+    def put(self, key, data):
+        p = self._file(key)
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            tmp = p.with_suffix('.tmp%d' % os.getpid())
+            tmp.write_bytes(data or b'')
+            tmp.replace(p)
+        except OSError:
+            pass  # Caching is only an optimisation
+
+
+def _thumbnails_worker(filename, paths, size, max_read):
+    with open_file(filename) as f:
+        return [make_thumbnail(f[p], size, max_read) for p in paths]
+
+
+def make_thumbnails(grp, size=THUMBNAIL_SIZE, max_read=MAX_READ_BYTES,
+                    jobs=None, cache=None, paths=None):
+    """Make thumbnails for image datasets in a group & its subgroups
+
+    Pass *paths* to make them only for those datasets. Returns a dict of
+    {dataset path: PNG data}. For files opened read-only, thumbnails are
+    cached on disk and made in parallel in separate processes.
+    """
+    if paths is None:
+        paths = []
+        def visit(name, obj):
+            if isinstance(obj, h5py.Dataset):
+                paths.append(obj.name)
+        grp.visititems(visit)
+    paths = [p for p in paths if is_image_dataset(grp.file[p])]
+
+    filename = grp.file.filename
+    if grp.file.mode != 'r' or not os.path.isfile(filename):
+        res = {p: make_thumbnail(grp.file[p], size, max_read) for p in paths}
+        return {p: d for p, d in res.items() if d}
+
+    if cache is None:
+        cache = ThumbnailCache()
+    res, todo = {}, []
+    for p in paths:
+        data = cache.get(cache.key(filename, p, size, max_read))
+        if data is None:
+            todo.append(p)
+        else:
+            res[p] = data
+
+    if jobs is None:
+        jobs = min(len(todo), os.cpu_count() or 1)
+    if jobs > 1 and len(todo) > 1:
+        batches = [todo[i::jobs] for i in range(jobs)]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futs = [pool.submit(_thumbnails_worker, filename, b, size, max_read)
+                    for b in batches]
+            made = [(p, d) for b, fut in zip(batches, futs)
+                    for p, d in zip(b, fut.result())]
+    else:
+        made = [(p, make_thumbnail(grp.file[p], size, max_read)) for p in todo]
+
+    for p, data in made:
+        cache.put(cache.key(filename, p, size, max_read), data)
+        res[p] = data
+    return {p: d for p, d in res.items() if d}
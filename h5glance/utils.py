@@ -1,5 +1,7 @@
 """Helper functions
 """
+import sys
+
 import h5py
 
 _mapping = {
@@ -55,9 +57,88 @@ def is_group(obj):
     return kind in ["file", "group"]
 
 
+def _link_index_type(grp):
+    flags = grp.id.get_create_plist().get_link_creation_order()
+    if flags & h5py.h5p.CRT_ORDER_INDEXED:
+        return h5py.h5.INDEX_CRT_ORDER
+    return h5py.h5.INDEX_NAME
+
+
+def member_names(grp, start=0, count=None):
+    """Names of up to *count* members of a group, from position *start*
+
+    The order is the same as iterating over the group: creation order if the
+    group tracks it, otherwise by name. Names are read through HDF5's link
+    index, so getting a few names from a huge group doesn't visit the rest.
+    """
+    if not isinstance(grp, h5py.Group):  # e.g. h5pyd
+        names = list(grp)
+        return names[start:None if count is None else start + count]
+    if count == 0 or start >= len(grp):
+        return []
+
+    names = []
+    def collect(name):
+        names.append(name.decode('utf-8', 'surrogateescape'))
+        if count is not None and len(names) >= count:
+            return True  # Stop iterating
+    grp.id.links.iterate(collect, idx_type=_link_index_type(grp), idx=start)
+    return names
+
+
+def head_tail_members(grp, max_children=None):
+    """Choose which members of a group to show
+
+    Returns (head names, number left out, tail names). With *max_children*,
+    the first and last members are shown, up to that many in total.
+    """
+    n = len(grp)
+    if max_children is None or n <= max_children:
+        return member_names(grp), 0, []
+    n_tail = max_children // 2
+    head = member_names(grp, 0, max_children - n_tail)
+    tail = member_names(grp, n - n_tail, n_tail) if n_tail else []
+    return head, n - max_children, tail
+
+
 def fmt_shape(shape):
     if shape is None:
         return "empty"
     if shape == ():
         return "scalar"
     return " × ".join(('Unlimited' if n is None else str(n)) for n in shape)
+
+
+def fmt_bytes(n):
+    for unit in ['bytes', 'KiB', 'MiB', 'GiB', 'TiB']:
+        if abs(n) < 1024 or unit == 'TiB':
+            break
+        n /= 1024
+    return ('{:.0f} {}' if unit == 'bytes' else '{:.1f} {}').format(n, unit)
+
+
+class ProgressBar:
+    """A simple progress bar on stderr, shown only if it's a terminal"""
+    width = 30
+
+    def __init__(self, total, label=''):
+        self.total = total
+        self.label = label
+        self.done = 0
+        self.enabled = sys.stderr.isatty()
+
+    def update(self, n):
+        self.done += n
+        if not self.enabled:
+            return
+        frac = min(self.done / self.total, 1) if self.total else 1
+        bar = '#' * int(frac * self.width)
+        sys.stderr.write('\r{}[{:<{}}] {:3.0f}% {} / {}'.format(
+            self.label, bar, self.width, frac * 100,
+            fmt_bytes(self.done), fmt_bytes(self.total)
+        ))
+        sys.stderr.flush()
+
+    def close(self):
+        if self.enabled:
+            sys.stderr.write('\n')
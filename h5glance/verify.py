@@ -0,0 +1,231 @@
+"""Check that all the data in a file can be read
+
+Each allocated chunk is read raw (checking the file can be read), and the
+same bytes are then decoded through the filter pipeline of an in-memory
+copy of the dataset (checking e.g. compressed data and checksums), so each
+chunk is read from the file once. Chunks of variable-length data only hold
+references into the file, so they're read normally. Contiguous data is
+read in blocks. The work is spread over several processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import time
+
+import h5py
+
+from . import pool
+from .profiles import open_file
+from .utils import ProgressBar, fmt_bytes
+
+
+class Task(pool.Task):
+    """A piece of one dataset to check in a worker process
+
+    kind is 'chunks' (the stored chunks at offsets), 'rows' (rows
+    start:stop of contiguous data) or 'all' (read the whole dataset).
+    """
+    def __init__(self, path, kind, start=0, stop=0, nbytes=0, offsets=None):
+        super().__init__(path, start, stop, nbytes)
+        self.kind = kind
+        self.offsets = offsets
+
+
+def _split(path, kind, n, nbytes, offsets=None):
+    return [Task(path, kind, a, b, nb,
+                 offsets[a:b] if offsets is not None else None)
+            for a, b, nb in pool.split(n, nbytes)]
+
+
+def chunk_offsets(ds):
+    """List the offsets of all stored chunks, in one pass
+
+    Looking up each chunk with get_chunk_info(i) gets slower as i grows,
+    so we walk the chunk index with chunk_iter where HDF5 supports it.
+    """
+    res = []
+    try:
+        ds.id.chunk_iter(lambda info: res.append(info.chunk_offset))
+    except (AttributeError, NotImplementedError):
+        return [ds.id.get_chunk_info(i).chunk_offset
+                for i in range(ds.id.get_num_chunks())]
+    return res
+
+
+def dataset_tasks(ds):
+    """Split checking one dataset into tasks"""
+    dcpl = ds.id.get_create_plist()
+    layout = dcpl.get_layout()
+    nbytes = ds.id.get_storage_size()
+    if layout == h5py.h5d.VIRTUAL:
+        return []  # The source datasets are checked in their own files
+    if layout == h5py.h5d.CHUNKED:
+        offsets = chunk_offsets(ds)
+        if not offsets:
+            return []
+        return _split(ds.name, 'chunks', len(offsets), nbytes, offsets)
+    if layout == h5py.h5d.CONTIGUOUS and ds.ndim and nbytes:
+        return _split(ds.name, 'rows', ds.shape[0], nbytes)
+    if ds.shape is None or nbytes == 0:
+        return []
+    return [Task(ds.name, 'all', nbytes=nbytes)]
+
+
+def collect_tasks(grp):
+    """Find all datasets in a group (or one dataset) & make tasks to check them
+
+    Returns (tasks, skipped) where skipped lists virtual datasets.
+    """
+    datasets = []
+    if isinstance(grp, h5py.Dataset):
+        datasets.append(grp)
+    else:
+        def visit(name, obj):
+            if isinstance(obj, h5py.Dataset):
+                datasets.append(obj)
+        grp.visititems(visit)
+
+    tasks, skipped = [], []
+    for ds in datasets:
+        if ds.id.get_create_plist().get_layout() == h5py.h5d.VIRTUAL:
+            skipped.append(ds.name)
+        tasks.extend(dataset_tasks(ds))
+    return tasks, skipped
+
+
+def _err(e):
+    return str(e) or type(e).__name__
+
+
+_decode_file = None
+
+def _decoder(ds):
+    """An in-memory dataset with one chunk of ds, to decode its raw chunks
+
+    It has the same type & filters as ds, and no chunk cache, so reading a
+    chunk written with write_direct_chunk runs it through the filters.
+    """
+    global _decode_file
+    if _decode_file is None:
+        _decode_file = h5py.File('decode', 'w', driver='core',
+                                 backing_store=False, rdcc_nbytes=0)
+    name = 'ds{}'.format(len(_decode_file))
+    space = h5py.h5s.create_simple(ds.chunks)
+    h5py.h5d.create(_decode_file.id, name.encode(), ds.id.get_type(), space,
+                    dcpl=ds.id.get_create_plist())
+    return _decode_file[name]
+
+
+def has_vlen(tid):
+    """Does a type refer to variable-length data stored elsewhere?"""
+    if isinstance(tid, h5py.h5t.TypeStringID) and tid.is_variable_str():
+        return True
+    return tid.detect_class(h5py.h5t.VLEN)
+
+
+def check_task(filename, task):
+    """Check one task, returning a list of (path, offset, error message)"""
+    ds = pool.worker_file(filename)[task.path]
+    problems = []
+    if task.kind == 'chunks' and has_vlen(ds.id.get_type()):
+        # The raw chunks hold global heap IDs, which only mean something
+        # in this file, so read the data through HDF5.
+        for offset in task.offsets:
+            sel = tuple(slice(o, min(o + c, n))
+                        for o, c, n in zip(offset, ds.chunks, ds.shape))
+            try:
+                ds[sel]
+            except Exception as e:
+                problems.append((task.path, offset, _err(e)))
+    elif task.kind == 'chunks':
+        dec = _decoder(ds)
+        origin = (0,) * ds.ndim
+        try:
+            for offset in task.offsets:
+                try:
+                    mask, data = ds.id.read_direct_chunk(offset)
+                except Exception as e:
+                    problems.append((task.path, offset, 'reading raw: ' + _err(e)))
+                    continue
+                try:
+                    dec.id.write_direct_chunk(origin, data, mask)
+                    dec[()]
+                except Exception as e:
+                    problems.append((task.path, offset, 'decoding: ' + _err(e)))
+        finally:
+            del _decode_file[dec.name]
+    elif task.kind == 'rows':
+        row_bytes = max(1, task.nbytes // max(task.stop - task.start, 1))
+        step = max(1, (4 << 20) // row_bytes)
+        for start in range(task.start, task.stop, step):
+            stop = min(start + step, task.stop)
+            try:
+                ds[start:stop]
+            except Exception as e:
+                offset = (start,) + (0,) * (ds.ndim - 1)
+                problems.append((task.path, offset, _err(e)))
+    else:
+        try:
+            ds[()]
+        except Exception as e:
+            problems.append((task.path, (), _err(e)))
+    return problems
+
+
+class VerifyResult:
+    def __init__(self, ndatasets, nbytes, problems, skipped, seconds):
+        self.ndatasets = ndatasets
+        self.nbytes = nbytes
+        self.problems = problems
+        self.skipped = skipped
+        self.seconds = seconds
+
+
+def verify_file(filename, path=None, jobs=None, progress=True):
+    """Check every chunk (or block of contiguous data) in a file"""
+    t0 = time.perf_counter()
+    with open_file(filename) as f:
+        tasks, skipped = collect_tasks(f[path] if path else f)
+    total = sum(t.nbytes for t in tasks)
+    ndatasets = len({t.path for t in tasks})
+    bar = ProgressBar(total, label='Verifying ') if progress else None
+
+    problems = []
+    if jobs == 1:
+        results = ((t, check_task(filename, t)) for t in tasks)
+        for task, res in results:
+            problems.extend(res)
+            if bar:
+                bar.update(task.nbytes)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futs = [(t, executor.submit(check_task, str(filename), t))
+                    for t in tasks]
+            for task, fut in futs:
+                try:
+                    problems.extend(fut.result())
+                except Exception as e:
+                    problems.append((task.path, None, _err(e)))
+                if bar:
+                    bar.update(task.nbytes)
+    if bar:
+        bar.close()
+
+    problems.sort(key=lambda p: (p[0], p[1] or ()))
+    return VerifyResult(ndatasets, total, problems, skipped,
+                        time.perf_counter() - t0)
+
+
+def print_report(result, file=None):
+    rate = result.nbytes / result.seconds if result.seconds else 0
+    print("Checked {} datasets ({} stored) in {:.1f} s ({}/s)".format(
+        result.ndatasets, fmt_bytes(result.nbytes), result.seconds,
+        fmt_bytes(rate)), file=file)
+    if result.skipped:
+        print("Skipped {} virtual datasets".format(len(result.skipped)),
+              file=file)
+    if not result.problems:
+        print("No problems found", file=file)
+        return
+    print("{} problems found:".format(len(result.problems)), file=file)
+    for path, offset, msg in result.problems:
+        where = ' at {}'.format(offset) if offset else ''
+        print("  {}{}: {}".format(path, where, msg), file=file)
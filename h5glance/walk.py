@@ -0,0 +1,174 @@
+"""Build the tree view of one big file in several processes
+
+Groups a level or a few levels down are split out as tasks, each walked
+by a worker process which opens the file itself. Nodes from the workers carry
+the address of the object they show, so when their trees are put back
+together in display order, an object reached through hard links in
+several subtrees is shown in full only the first time, like the serial
+tree view. If a worker only showed an object in a subtree which turns out
+to be hidden, the next link to it is walked again in this process.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import h5py
+import numpy
+
+from .profiles import open_file
+from .terminal import ColorsDefault, ColorsNone, TreeViewBuilder, use_colors
+
+# Split at a deeper level if there are fewer groups than this per worker
+MIN_TASKS_PER_JOB = 4
+MAX_SPLIT_DEPTH = 3
+
+
+class KeyedTreeViewBuilder(TreeViewBuilder):
+    """Build tree nodes marked with the objects they show
+
+    Object nodes are (line, children, key), where key is ('new', address,
+    first path, label) or ('dup', address, first path, path, name,
+    max_depth). Other nodes are (line, children) as usual.
+    :func:`merge_tree` turns these into a normal tree.
+    """
+    def __init__(self, expand_attrs=False, max_children=None, colors=True):
+        super().__init__(expand_attrs=expand_attrs, max_children=max_children)
+        self.colors = ColorsDefault if colors else ColorsNone
+        self._link = None
+
+    def object_node(self, obj, name, max_depth=numpy.inf):
+        # Where this link is, in case merge_tree needs to walk it again
+        self._link = (obj.name, name, max_depth)
+        return super().object_node(obj, name, max_depth=max_depth)
+
+    def duplicate_node(self, label, obj_id):
+        return label, [], ('dup', obj_id, self.visited[obj_id]) + self._link
+
+    def new_node(self, label, details, children, obj_id):
+        return label + details, children, ('new', obj_id,
+                                           self.visited[obj_id], label)
+
+
+class Task:
+    """A group to be walked in a worker process"""
+    def __init__(self, path, name, max_depth):
+        self.path = path
+        self.name = name
+        self.max_depth = max_depth
+
+
+class SplittingTreeViewBuilder(KeyedTreeViewBuilder):
+    """Build the node for one group, leaving its subgroups as tasks
+
+    The tasks are placeholders in the tree, to be replaced by the nodes
+    built for them later.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.depth = 0
+        self.tasks = []
+        self._pending = {}  # Address -> path for groups split out as tasks
+
+    def object_node(self, obj, name, max_depth=numpy.inf):
+        if self.depth == 1 and isinstance(obj, h5py.Group) and max_depth >= 1:
+            obj_id = self.object_key(obj)
+            if obj_id in self._pending:
+                # Another link to a group already in a task
+                label = self.colors.group + name + self.colors.reset
+                return label, [], ('dup', obj_id, self._pending[obj_id],
+                                   obj.name, name, max_depth)
+            if obj_id not in self.visited:
+                self._pending[obj_id] = obj.name
+                task = Task(obj.name, name, max_depth)
+                self.tasks.append(task)
+                return task
+        self.depth += 1
+        try:
+            return super().object_node(obj, name, max_depth=max_depth)
+        finally:
+            self.depth -= 1
+
+
+def split_group(grp, name, max_depth, **kwargs):
+    """Build the node for a group, returning (node, tasks for its subgroups)"""
+    tvb = SplittingTreeViewBuilder(**kwargs)
+    return tvb.object_node(grp, name, max_depth=max_depth), tvb.tasks
+
+
+def walk_subtree(filename, task, expand_attrs, max_children, colors):
+    """Build the tree nodes for one group; runs in worker processes"""
+    tvb = KeyedTreeViewBuilder(expand_attrs=expand_attrs,
+                               max_children=max_children, colors=colors)
+    with open_file(filename) as f:
+        return tvb.object_node(f[task.path], task.name,
+                               max_depth=task.max_depth)
+
+
+def merge_tree(node, results, rewalk, visited=None):
+    """Replace task placeholders with results, & resolve hard links
+
+    Objects are shown in full only where they're first reached in display
+    order, even if different workers each saw them first in their part.
+    A link to an object which a worker showed only inside a subtree that
+    is hidden here is passed to ``rewalk(path, name, max_depth, visited)``.
+    """
+    if visited is None:
+        visited = {}
+    if isinstance(node, Task):
+        node = results[node]
+    if len(node) == 2:
+        line, children = node
+        return line, [merge_tree(c, results, rewalk, visited)
+                      for c in children]
+
+    line, children, key = node
+    kind, addr, first_path = key[:3]
+    if kind == 'dup':
+        if addr not in visited:
+            return rewalk(*key[3:], visited)
+        return line + '\t= ' + visited[addr], []
+    if addr in visited:
+        return key[3] + '\t= ' + visited[addr], []
+    visited[addr] = first_path
+    return line, [merge_tree(c, results, rewalk, visited) for c in children]
+
+
+def parallel_tree(filename, grp, name, jobs=None, max_depth=numpy.inf,
+                  expand_attrs=False, max_children=None):
+    """Build the tree view of a group, walking its subgroups in parallel
+
+    Groups are split into tasks one level at a time, in this process,
+    until there are enough tasks to share between the workers.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    colors = use_colors()
+    kw = dict(expand_attrs=expand_attrs, max_children=max_children,
+              colors=colors)
+    top, tasks = split_group(grp, name, max_depth, **kw)
+
+    results = {}  # Task -> node
+    for _ in range(MAX_SPLIT_DEPTH - 1):
+        if not tasks or len(tasks) >= jobs * MIN_TASKS_PER_JOB:
+            break
+        subtasks = []
+        for t in tasks:
+            results[t], sub = split_group(grp.file[t.path], t.name,
+                                          t.max_depth, **kw)
+            subtasks += sub
+        tasks = subtasks
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+            futs = [(t, pool.submit(walk_subtree, str(filename), t,
+                                    expand_attrs, max_children, colors))
+                    for t in tasks]
+            for t, fut in futs:
+                results[t] = fut.result()
+
+    def rewalk(path, name, max_depth, visited):
+        tvb = TreeViewBuilder(expand_attrs=expand_attrs,
+                              max_children=max_children)
+        tvb.visited = visited  # Shared, so this continues the merged tree
+        return tvb.object_node(grp.file[path], name, max_depth=max_depth)
+
+    return merge_tree(top, results, rewalk)
@@ -0,0 +1,40 @@
+import io
+import h5py
+import numpy as np
+
+from h5glance import aggregate
+from h5glance.terminal import ColorsNone
+
+def make_sequence(directory, lengths):
+    paths = []
+    for i, n in enumerate(lengths):
+        path = directory / 'RAW-R0001-DA01-S{:05d}.h5'.format(i)
+        with h5py.File(path, 'w') as f:
+            f.create_dataset('INSTRUMENT/det/data', (n, 16, 8), dtype='f4')
+            f.create_dataset('INDEX/trainId', (n,), dtype='u8')
+            f['METADATA/version'] = 1
+        paths.append(str(path))
+    return paths
+
+def test_sequence_name():
+    assert aggregate.sequence_name('/a/RAW-R0001-DA01-S00012.h5') \
+        == 'RAW-R0001-DA01-S*.h5'
+
+def test_merged_tree(tmp_path):
+    paths = make_sequence(tmp_path, [10, 20, 5])
+    with h5py.File(paths[2], 'a') as f:
+        f['extra'] = [1, 2, 3]
+
+    structures = aggregate.read_structures(
+        aggregate.find_files(str(tmp_path)), jobs=2)
+    [seqset] = aggregate.group_sequences(structures)
+    assert len(seqset.common) == 2
+    assert [s.filename for s in seqset.outliers] == [paths[2]]
+
+    sio = io.StringIO()
+    aggregate.print_aggregate(structures, ColorsNone, file=sio)
+    out = sio.getvalue()
+    assert 'RAW-R0001-DA01-S*.h5 (2 files)' in out
+    assert 'data\t[float32: 30 (Σ over 2 files) × 16 × 8]' in out
+    assert 'version\t[int64: scalar]' in out
+    assert 'S00002.h5: 1 extra: /extra' in out
@@ -0,0 +1,63 @@
+import h5py
+import pytest
+
+from h5glance.browse import TreeModel
+
+def names(model):
+    return [r.path for r in model.rows]
+
+def test_expand_collapse(simple_h5_file):
+    model = TreeModel(simple_h5_file)
+    assert names(model) == ['/', '/compound', '/group1', '/prose', '/synonyms']
+    assert model._children.keys() == {'/'}  # Groups are listed lazily
+
+    model.expand(2)
+    assert names(model)[3:8] == [
+        '/group1/empty', '/group1/scalar', '/group1/subgroup1',
+        '/group1/subgroup2', '/prose',
+    ]
+    assert model.rows[5].depth == 2
+    assert model.label(model.rows[4]) == 'scalar  [int32: scalar]'
+
+    model.expand(5)
+    assert names(model)[6:8] == ['/group1/subgroup1/dataset1',
+                                 '/group1/subgroup1/dataset2']
+    assert model.parent_index(6) == 5
+
+    model.collapse(2)
+    assert names(model) == ['/', '/compound', '/group1', '/prose', '/synonyms']
+    model.expand(2)  # Subgroups start collapsed again
+    assert len(model.rows) == 9
+
+def test_details(simple_h5_file):
+    model = TreeModel(simple_h5_file)
+    model.expand(2)
+    assert 'shape: scalar' in model.details(4)
+    assert '2 attributes' in model.details(2)
+
+def test_find(simple_h5_file):
+    model = TreeModel(simple_h5_file)
+    i = model.find('dataset2')
+    assert model.rows[i].path == '/group1/subgroup1/dataset2'
+    j = model.find('dataset', i)
+    assert model.rows[j].path == '/group1/subgroup2/dataset1'
+    assert model.find('nonexistent') is None
+
+def test_resolve(tmp_path):
+    with h5py.File(tmp_path / 'links.h5', 'w') as f:
+        f.create_dataset('g/h/x', shape=(2,), dtype='i4')
+        f['soft'] = h5py.SoftLink('/g/h')
+        f['g/rel'] = h5py.SoftLink('h')
+        f['g/h/back'] = h5py.SoftLink('/soft')
+        f['loop'] = h5py.SoftLink('/loop/a')
+        model = TreeModel(f)
+        assert model.resolve('soft/x') == '/g/h/x'
+        assert model.resolve('/g/rel/x') == '/g/h/x'
+        assert model.resolve('g/h/back/back/x') == '/g/h/x'
+        assert model.resolve('soft') == '/soft'  # The link itself
+        for bad in ['nope', 'g/nope/x', 'g/h/x/y', 'loop/b']:
+            with pytest.raises(KeyError):
+                model.resolve(bad)
+        for path, expected in [('soft/x', '/g/h/x'), ('soft', '/soft')]:
+            i = model.reveal(model.resolve(path))
+            assert model.rows[i].path == expected
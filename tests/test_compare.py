@@ -0,0 +1,90 @@
+import h5py
+import numpy as np
+import pytest
+
+from h5glance import compare, pool
+from h5glance.cli import make_compare_parser
+
+def make_pair(tmp_path):
+    data = np.random.default_rng(0).normal(size=(400, 50))
+    paths = tmp_path / 'a.h5', tmp_path / 'b.h5'
+    for path, changed in zip(paths, [False, True]):
+        x = data.copy()
+        if changed:
+            x[120, 3] += 0.5
+        with h5py.File(path, 'w') as f:
+            f.create_dataset('compressed', data=x, chunks=(50, 50),
+                             compression='gzip')
+            f.create_dataset('rechunked', data=data,
+                             chunks=(100, 50) if changed else (50, 50))
+            f['contiguous'] = x
+            f['strings'] = ['a', 'b']
+            f['mismatch'] = np.zeros(3 if changed else 4)
+            f['only_a' if changed else 'only_b'] = 1
+            if changed:
+                f['group_in_a'] = 1
+            else:
+                f.create_group('group_in_a')
+    return paths
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_compare_files(tmp_path, jobs):
+    a, b = make_pair(tmp_path)
+    res = compare.compare_files(a, b, jobs=jobs, progress=False)
+    assert res.differs
+    diffs = {d.path: d for d in res.datasets}
+    assert set(diffs) == {'/compressed', '/rechunked', '/contiguous', '/strings'}
+
+    comp = diffs['/compressed']
+    assert (comp.nchunks, comp.ndiff_chunks, comp.ndiff_values) == (8, 1, 1)
+    assert comp.nraw == 7  # Unchanged chunks aren't decoded
+    assert comp.offsets == [(100, 0)]
+    assert comp.max_abs == pytest.approx(0.5)
+
+    assert diffs['/contiguous'].ndiff_values == 1
+    assert diffs['/rechunked'].ndiff_chunks == 0
+    assert diffs['/rechunked'].nraw == 0  # Different chunks must be decoded
+    assert diffs['/strings'].ndiff_chunks == 0
+
+    assert res.problems == [
+        ('/group_in_a', 'not a dataset in the first file'),
+        ('/mismatch', 'shapes differ: (4,) vs (3,)'),
+        ('/only_a', 'only in the second file'),
+        ('/only_b', 'only in the first file'),
+    ]
+
+def test_compare_unreadable(tmp_path):
+    a, b = make_pair(tmp_path)
+    with h5py.File(b, 'r+') as f:
+        f['compressed'].id.write_direct_chunk((0, 0), b'not gzip data')
+    for jobs in (1, 2):
+        res = compare.compare_files(a, b, jobs=jobs, progress=False)
+        assert '/compressed' in dict(res.problems)
+        assert '/compressed' not in {d.path for d in res.datasets}
+    assert not pool._worker_files  # Serial runs don't keep files open
+
+def test_run_exit_status(tmp_path):
+    a, b = make_pair(tmp_path)
+    def status(*argv):
+        args = make_compare_parser().parse_args(argv)
+        with pytest.raises(SystemExit) as exc:
+            compare.run(args)
+        return exc.value.code
+    assert status(str(a), str(a), '-j1') == 0
+    assert status(str(a), str(b), '-j1') == 1
+    assert status(str(a), str(b), 'nonexistent', '-j1') == 2
+    assert status(str(a), str(tmp_path / 'missing.h5')) == 2
+
+def test_compare_same(tmp_path):
+    a, _ = make_pair(tmp_path)
+    res = compare.compare_files(a, a, path='compressed', jobs=1, progress=False)
+    assert not res.differs
+    assert res.datasets[0].nraw == 8
+
+def test_diff_arrays():
+    x = np.array([1., np.nan, 4., 0.])
+    y = np.array([1., np.nan, 5., 2.])
+    assert compare.diff_arrays(x, y) == (2, 2., 1.)
+    u = np.array([0, 255], dtype=np.uint8)
+    assert compare.diff_arrays(u, u[::-1]) == (2, 255., 1.)
+    assert compare.diff_arrays(np.array(['a', 'b']), np.array(['a', 'c'])) == (1, 0., 0.)
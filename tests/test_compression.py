@@ -0,0 +1,31 @@
+import h5py
+import numpy as np
+import pytest
+
+from h5glance import compression
+
+def test_try_compression(tmp_path):
+    path = tmp_path / 'sample.h5'
+    with h5py.File(path, 'w') as f:
+        f.create_dataset('zeros', shape=(400, 50), chunks=(10, 50), dtype='u2',
+                         fillvalue=0, compression='gzip')
+        f['zeros'][:] = 0
+        f['strings'] = [b'a', b'bc']
+
+    res = compression.try_compression(path, 'zeros', max_chunks=6, jobs=1)
+    assert res.nchunks == 40
+    assert res.nsampled == 6
+    assert res.current == 'gzip (4)'
+    by_name = {r.name: r for r in res.results}
+    assert by_name['none'].raw_bytes == 6 * 10 * 50 * 2
+    assert by_name['none'].ratio == pytest.approx(1)
+    assert by_name['gzip-9'].ratio > 10
+    assert not any(r.error for r in res.results)
+
+    # Same totals when split over several processes
+    res2 = compression.try_compression(path, 'zeros', max_chunks=6, jobs=2)
+    assert [r.stored_bytes for r in res2.results] == \
+           [r.stored_bytes for r in res.results]
+
+    with pytest.raises(ValueError):
+        compression.try_compression(path, 'strings', jobs=1)
@@ -0,0 +1,76 @@
+import h5py
+import numpy as np
+import pytest
+
+from h5glance import export
+from h5glance.terminal import save_dataset
+
+@pytest.fixture()
+def data_file(tmp_path):
+    path = tmp_path / 'sample.h5'
+    with h5py.File(path, 'w') as f:
+        data = np.arange(1000 * 6, dtype='>i4').reshape(1000, 6)
+        f.create_dataset('plain', data=data, chunks=(64, 6))
+        f.create_dataset('compressed', data=data, chunks=(64, 3),
+                         compression='gzip')
+        f.create_dataset('sparse', shape=(300, 6), chunks=(100, 6),
+                         fillvalue=7, dtype='i2')
+        f['sparse'][100:200] = 1
+    with h5py.File(path, 'r') as f:
+        yield f
+
+@pytest.mark.parametrize('name, index', [
+    ('plain', (slice(10, 900),)),
+    ('plain', ()),
+    ('compressed', (slice(5, 700, 3), slice(1, 4))),
+    ('sparse', (slice(None),)),
+])
+def test_export_npy(data_file, tmp_path, name, index):
+    ds = data_file[name]
+    out = tmp_path / 'out.npy'
+    export.export_selection(ds, index, out, block_bytes=1000, progress=False)
+    np.testing.assert_array_equal(np.load(out), ds[index])
+    assert np.load(out).dtype == ds.dtype
+
+def test_export_raw(data_file, tmp_path):
+    out = tmp_path / 'out.raw'
+    export.export_selection(data_file['plain'], (slice(3, 7),), out,
+                            progress=False)
+    np.testing.assert_array_equal(
+        np.fromfile(out, dtype='>i4').reshape(4, 6), data_file['plain'][3:7]
+    )
+
+def test_can_copy_raw_chunks(data_file):
+    assert export.can_copy_raw_chunks(data_file['plain'], (slice(10, 20),))
+    assert export.can_copy_raw_chunks(data_file['plain'],
+                                      (slice(None), slice(0, 6)))
+    assert not export.can_copy_raw_chunks(data_file['plain'],
+                                          (slice(None), slice(0, 3)))
+    assert not export.can_copy_raw_chunks(data_file['compressed'],
+                                          (slice(None),))
+
+def test_export_custom_float(tmp_path):
+    # h5py reads this 2-byte float type as float32, so chunks can't be copied
+    mytype = h5py.h5t.IEEE_F16LE.copy()
+    mytype.set_fields(14, 9, 5, 0, 9)
+    mytype.set_ebias(53)
+    dcpl = h5py.h5p.create(h5py.h5p.DATASET_CREATE)
+    dcpl.set_chunk((2, 4))
+    path = tmp_path / 'custom.h5'
+    with h5py.File(path, 'w') as f:
+        space = h5py.h5s.create_simple((6, 4))
+        h5py.h5d.create(f.id, b'a', mytype, space, dcpl=dcpl)
+        f['a'][:] = np.arange(24, dtype='f4').reshape(6, 4) * 2**-30
+
+    with h5py.File(path, 'r') as f:
+        assert not export.can_copy_raw_chunks(f['a'], (slice(None),))
+        out = tmp_path / 'out.npy'
+        export.export_selection(f['a'], (), out, progress=False)
+        np.testing.assert_array_equal(np.load(out), f['a'][()])
+
+@pytest.mark.parametrize('slice_expr', ['foo(', '5000', '0, 1.5', 'nope'])
+def test_save_bad_slice(data_file, tmp_path, slice_expr):
+    with pytest.raises(SystemExit) as exc:
+        save_dataset(data_file.filename, 'plain', slice_expr,
+                     tmp_path / 'out.npy')
+    assert 'Error slicing' in str(exc.value.code)
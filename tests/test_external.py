@@ -0,0 +1,62 @@
+import io
+
+import h5py
+import pytest
+
+from h5glance import html
+from h5glance.external import ExternalLinks, FilePool
+from h5glance.terminal import TreeViewBuilder, print_tree
+
+@pytest.fixture()
+def linked_files(tmp_path):
+    for name in ['data1.h5', 'data2.h5']:
+        with h5py.File(tmp_path / name, 'w') as f:
+            for i in range(5):
+                f[f'grp/ds{i}'] = [i]
+    with h5py.File(tmp_path / 'data2.h5', 'a') as f:
+        f['back'] = h5py.ExternalLink('master.h5', '/')  # A cycle
+    with h5py.File(tmp_path / 'master.h5', 'w') as f:
+        for i in range(100):
+            data_file = 'data1.h5' if i % 2 else 'data2.h5'
+            f[f'links/l{i:03d}'] = h5py.ExternalLink(data_file, f'/grp/ds{i % 5}')
+        f['whole'] = h5py.ExternalLink('data2.h5', '/')
+        f['missing'] = h5py.ExternalLink('nonexistent.h5', '/foo')
+    return tmp_path / 'master.h5'
+
+def test_follow_external_terminal(linked_files):
+    external = ExternalLinks()
+    tvb = TreeViewBuilder(external=external)
+    with h5py.File(linked_files, 'r') as f:
+        sio = io.StringIO()
+        print_tree(tvb.object_node(f, str(linked_files)), file=sio)
+    external.close()
+    out = sio.getvalue()
+
+    assert 'l001 -> data1.h5//grp/ds1\t[int64: 1]' in out
+    # The same objects are reached repeatedly through links
+    assert 'l015 -> data1.h5//grp/ds0\t= ' in out
+    assert 'missing\t-> nonexistent.h5//foo (file not found)' in out
+    # The cycle back to the master file is shown, but not followed
+    assert out.count('back -> master.h5//') == 1
+    assert '/grp/ds3' in out
+    # Each file is opened once: 2 data files + master through the cycle
+    assert external.pool.n_opened == 3
+
+def test_follow_external_html(linked_files):
+    h = str(html.make_document(linked_files, follow_external=True))
+    assert 'l001 → data1.h5//grp/ds1' in h
+    assert 'nonexistent.h5//foo (file not found)' in h
+    assert 'back → master.h5//' in h and '(= ' in h
+
+def test_file_pool_limit(linked_files):
+    d = linked_files.parent
+    pool = FilePool(max_open=1)
+    f1 = pool.acquire(str(d / 'data1.h5'))
+    pool.acquire(str(d / 'data2.h5'))
+    assert len(pool.files) == 2  # data1.h5 is still in use
+    pool.release(str(d / 'data1.h5'))
+    pool.release(str(d / 'data2.h5'))
+    pool.acquire(str(d / 'master.h5'))
+    assert list(pool.files) == [str(d / 'master.h5')]
+    assert not f1.id.valid
+    pool.close()
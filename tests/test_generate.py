@@ -1,3 +1,7 @@
+import h5py
+import os
+import re
+
 from h5glance import html
 
 
@@ -11,3 +15,37 @@ def test_make_document(simple_h5_file):
     h = str(html.make_document(simple_h5_file))
     assert 'subgroup1' in h
     assert '<!DOCTYPE' in h
+
+def test_max_depth_children(simple_h5_file):
+    h = html.h5obj_to_html(simple_h5_file, max_depth=1)
+    assert 'group1 (4 members)' in h
+    assert 'subgroup1' not in h
+
+    h = html.h5obj_to_html(simple_h5_file, max_children=2)
+    assert '… 2 more' in h  # Root has 2 groups & 2 datasets
+    assert 'prose' not in h
+
+def test_cached_html(closed_h5_file):
+    h1 = html.h5obj_to_html(closed_h5_file)
+    with h5py.File(closed_h5_file, 'r') as f:
+        h2 = html.h5obj_to_html(f)
+    assert html._cached_html.cache_info().hits >= 1
+    # Cached HTML gets new element IDs each time it's displayed
+    ids = re.findall(r'id="(h5glance-container-\d+)"', h1 + h2)
+    assert len(ids) == 2 and ids[0] != ids[1]
+    assert h2.count(ids[1]) == 2  # Tree view & script to activate it
+
+    with h5py.File(closed_h5_file, 'a') as f:
+        f['extra_dataset'] = [1, 2]
+    os.utime(closed_h5_file, ns=(0, 12345))
+    assert 'extra_dataset' in html.h5obj_to_html(closed_h5_file)
+
+def root_label(h):
+    return re.search(r'<label for="[^"]+">([^<]*)</label>', h)[1]
+
+def test_cached_html_root_label(closed_h5_file):
+    fname = str(closed_h5_file)
+    assert root_label(html.h5obj_to_html(fname)) == fname
+    with h5py.File(fname, 'r') as f:
+        assert root_label(html.h5obj_to_html(f)) == fname
+        assert root_label(html.h5obj_to_html(f['group1'])) == '/group1'
@@ -1,6 +1,139 @@
-from h5glance.html_cli import main
+from concurrent.futures import Future
+import gzip
+import h5py
+from http.server import ThreadingHTTPServer
+import os
+import shutil
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pytest
+
+from h5glance import thumbnails
+from h5glance.html_cli import (
+    main, DirectoryView, FileView, make_handler, _index_file,
+)
 
 def test_html_cli_write(tmp_path, closed_h5_file):
     out_file = tmp_path / 'out.html'
     main([str(closed_h5_file), '-w', str(out_file)])
     assert out_file.is_file()
+
+@pytest.fixture()
+def view_server(closed_h5_file):
+    view = FileView(closed_h5_file)
+    server = ThreadingHTTPServer(('localhost', 0), make_handler(view))
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    yield "http://localhost:{}/".format(server.server_port)
+    server.shutdown()
+    server.server_close()
+    view.close()
+
+def test_serve_etag_gzip(view_server):
+    with urlopen(view_server) as r:
+        assert r.status == 200
+        etag = r.headers['ETag']
+        assert b'subgroup1' in r.read()
+
+    req = Request(view_server, headers={'If-None-Match': etag})
+    with pytest.raises(HTTPError) as excinfo:
+        urlopen(req)
+    assert excinfo.value.code == 304
+
+    req = Request(view_server, headers={'Accept-Encoding': 'gzip'})
+    with urlopen(req) as r:
+        assert r.headers['Content-Encoding'] == 'gzip'
+        assert b'subgroup1' in gzip.decompress(r.read())
+
+def test_file_view_rerenders_on_change(closed_h5_file):
+    view = FileView(closed_h5_file)
+    r1 = view.render()
+    assert view.render() is r1
+    view.close()
+    with h5py.File(closed_h5_file, 'a') as f:
+        f['new_dataset'] = [1, 2, 3]
+    os.utime(closed_h5_file, ns=(0, 12345))
+    r2 = view.render()
+    assert r2.etag != r1.etag
+    assert b'new_dataset' in r2.body
+    view.close()
+
+def test_directory_view(tmp_path, closed_h5_file):
+    (tmp_path / 'run1').mkdir()
+    shutil.copy(closed_h5_file, tmp_path / 'run1' / 'a.h5')
+    shutil.copy(closed_h5_file, tmp_path / 'run1' / 'b.h5')
+    (tmp_path / 'run1' / 'broken.h5').write_bytes(b'not really HDF5')
+    (tmp_path / 'run1' / 'notes.txt').write_text('ignored')
+
+    view = DirectoryView(tmp_path / 'run1', jobs=2)
+    try:
+        index = view.get('/').body.decode()
+        assert 'a.h5' in index and 'broken.h5' in index
+        assert 'notes.txt' not in index
+
+        page = view.get('/f/a.h5')
+        assert b'subgroup1' in page.body
+        assert view.get('/f/a.h5') is page  # Cached
+        assert view.get('/f/missing.h5') is None
+
+        view.pool.shutdown(wait=True)
+        assert view.entries['b.h5'].state == 'indexed'
+        assert view.entries['broken.h5'].state == 'error'
+        assert view.entries['broken.h5'].error
+    finally:
+        view.close()
+
+def test_index_file_thumbnails(tmp_path, monkeypatch):
+    # Index workers make thumbnails themselves, not in a pool of their own
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    monkeypatch.setattr(os, 'cpu_count', lambda: 4)
+    def no_pool(*args, **kwargs):
+        raise AssertionError("Started a process pool")
+    monkeypatch.setattr(thumbnails, 'ProcessPoolExecutor', no_pool)
+
+    with h5py.File(tmp_path / 'images.h5', 'w') as f:
+        for name in ['a', 'b', 'c']:
+            f[name] = np.ones((20, 20))
+    fragment = _index_file(tmp_path / 'images.h5', True)
+    assert fragment.count('data:image/png;base64,') == 3
+
+def test_directory_view_finished_future(tmp_path, closed_h5_file):
+    # A future which is done before its callback is added runs the callback
+    # straight away, while _submit holds the lock
+    class DoneExecutor:
+        def submit(self, fn, *args):
+            fut = Future()
+            fut.set_result(fn(*args))
+            return fut
+
+    shutil.copy(closed_h5_file, tmp_path / 'a.h5')
+    view = DirectoryView(tmp_path, jobs=1)
+    view.pool.shutdown()
+    view.pool = DoneExecutor()
+    view.entries.clear()
+    view.refresh()
+    assert view.entries['a.h5'].state == 'indexed'
+
+def test_members_paging(tmp_path):
+    path = tmp_path / 'wide.h5'
+    with h5py.File(path, 'w') as f:
+        for i in range(30):
+            f[f'grp/x{i:02d}'] = i
+
+    view = FileView(path, max_children=10)
+    try:
+        page = view.get('/').body.decode()
+        assert '… 20 more' in page
+        assert 'x05' not in page
+        assert '?members=%2Fgrp&amp;start=5' in page
+
+        page = view.get('/', {'members': ['/grp'], 'start': ['5']}).body.decode()
+        assert 'Members 6–15 of 30' in page
+        assert 'x05' in page and 'x14' in page and 'x15' not in page
+        assert 'start=15' in page  # Link to the next page
+        assert view.get('/', {'members': ['/nonexistent']}) is None
+    finally:
+        view.close()
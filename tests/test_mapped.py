@@ -0,0 +1,44 @@
+import h5py
+import numpy as np
+
+from h5glance import mapped
+
+def test_mapped_array(tmp_path):
+    path = tmp_path / 'sample.h5'
+    data = np.arange(600, dtype='f8').reshape(20, 30)
+    with h5py.File(path, 'w', userblock_size=512) as f:
+        f['contiguous'] = data
+        f.create_dataset('chunked', data=data, chunks=(5, 5))
+        f.create_dataset('big_endian', data=data.astype('>f8'))
+        f.create_dataset('unallocated', shape=(10,), dtype='i4')
+        f.create_dataset('external', shape=(10,), dtype='i4',
+                         external=[(str(tmp_path / 'ext.bin'), 0, 40)])
+
+    with h5py.File(path, 'r') as f:
+        arr = mapped.mapped_array(f['contiguous'])
+        assert isinstance(arr, np.memmap)
+        np.testing.assert_array_equal(arr, data)
+        np.testing.assert_array_equal(mapped.read(f['contiguous'], (3, slice(2, 9))),
+                                      data[3, 2:9])
+
+        for name in ['chunked', 'big_endian', 'unallocated', 'external']:
+            assert mapped.mapped_array(f[name]) is None, name
+        np.testing.assert_array_equal(mapped.read(f['big_endian'], slice(0, 2)),
+                                      data[:2])
+
+    # Not used while the file is open for writing
+    with h5py.File(path, 'r+') as f:
+        assert mapped.mapped_array(f['contiguous']) is None
+
+
+def test_mapped_custom_float(file_with_custom_float):
+    # h5py reads this 2-byte float type (with a tiny range) as float32
+    data = np.arange(12, dtype='f4').reshape(3, 4) * 2**-30
+    file_with_custom_float['a'][:] = data
+    path = file_with_custom_float.filename
+    file_with_custom_float.close()
+
+    with h5py.File(path, 'r') as f:
+        assert f['a'].dtype == np.float32
+        assert mapped.mapped_array(f['a']) is None
+        np.testing.assert_array_equal(mapped.read(f['a'], ()), data)
@@ -0,0 +1,7 @@
+from h5glance import pool
+
+def test_split(monkeypatch):
+    monkeypatch.setattr(pool, 'TASK_BYTES', 100)
+    assert pool.split(10, 250) == [(0, 3, 75), (3, 6, 75), (6, 10, 100)]
+    assert pool.split(2, 1000) == [(0, 1, 500), (1, 2, 500)]  # Whole pieces
+    assert pool.split(5, 0) == [(0, 5, 0)]
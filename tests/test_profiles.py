@@ -0,0 +1,51 @@
+import pytest
+
+from h5glance import profiles
+
+def test_parse_size():
+    assert profiles.parse_size('4096') == 4096
+    assert profiles.parse_size('64M') == 64 << 20
+    assert profiles.parse_size('1GiB') == 1 << 30
+    assert profiles.parse_size('1.5k') == 1536
+
+def test_resolve_settings(tmp_path):
+    cfg = tmp_path / 'config.ini'
+    cfg.write_text("[open]\n"
+                   "rdcc_nbytes = 8M\n"
+                   "profile = mine\n"
+                   "[profile:mine]\n"
+                   "rdcc_nslots = 1009\n"
+                   "mdc_size = 4M\n")
+    s = profiles.resolve_settings(env='', config_file=cfg)
+    assert s == {'rdcc_nbytes': 8 << 20, 'rdcc_nslots': 1009,
+                 'mdc_size': 4 << 20}
+
+    # Environment variable overrides config file; CLI overrides both
+    s = profiles.resolve_settings(
+        cli={'rdcc_nbytes': '2M', 'profile': None},
+        env='profile=network,rdcc_nslots=7', config_file=cfg
+    )
+    assert s['rdcc_nbytes'] == 2 << 20
+    assert s['rdcc_nslots'] == 7
+    assert s['page_buf_size'] == profiles.BUILTIN_PROFILES['network']['page_buf_size']
+
+    with pytest.raises(ValueError):
+        profiles.resolve_settings(env='profile=nonexistent', config_file=cfg)
+    with pytest.raises(ValueError):
+        profiles.resolve_settings(env='colour=blue', config_file=cfg)
+
+def test_open_file(closed_h5_file):
+    settings = {'rdcc_nbytes': 8 << 20, 'rdcc_nslots': 1009,
+                'mdc_size': 4 << 20}
+    with profiles.open_file(closed_h5_file, settings) as f:
+        assert f.id.get_access_plist().get_cache()[1:3] == (1009, 8 << 20)
+        assert f.id.get_mdc_config().initial_size == 4 << 20
+        assert 'group1' in f
+
+    with profiles.open_file(closed_h5_file, profiles.BUILTIN_PROFILES['core']) as f:
+        assert f.driver == 'core'
+
+def test_benchmark(closed_h5_file):
+    res = profiles.benchmark(closed_h5_file, rounds=1)
+    assert {name for name, _ in res} >= {'default', 'network', 'core'}
+    assert res == sorted(res, key=lambda r: r[1])
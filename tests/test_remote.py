@@ -0,0 +1,70 @@
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import io
+import os
+import re
+import threading
+
+import numpy as np
+import pytest
+
+from h5glance import remote
+from h5glance.profiles import open_file
+from h5glance.terminal import group_to_str
+
+class RangeHandler(SimpleHTTPRequestHandler):
+    """Serve files with support for single range requests"""
+    def send_head(self):
+        m = re.fullmatch(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        if m is None:
+            return super().send_head()
+        with open(self.translate_path(self.path), 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            start, end = int(m[1]), min(int(m[2]), size - 1)
+            f.seek(start)
+            data = f.read(end - start + 1)
+        self.send_response(206)
+        self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        return io.BytesIO(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture()
+def served_dir(tmp_path):
+    handler = partial(RangeHandler, directory=str(tmp_path))
+    server = ThreadingHTTPServer(('localhost', 0), handler)
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    yield tmp_path, "http://localhost:{}/".format(server.server_port)
+    server.shutdown()
+    server.server_close()
+
+def test_range_file(served_dir):
+    directory, url = served_dir
+    content = np.random.default_rng(0).bytes(10_000)
+    (directory / 'data.bin').write_bytes(content)
+
+    f = remote.HTTPRangeFile(url + 'data.bin', block_size=1024, readahead=0)
+    assert f.size == 10_000
+    f.seek(100)
+    assert f.read(3000) == content[100:3100]
+    assert f.stats.requests == 1  # Adjacent missing blocks fetched together
+
+    f.seek(500)
+    assert f.read(1000) == content[500:1500]
+    assert f.stats.requests == 1  # From the cache
+    f.seek(-10, io.SEEK_END)
+    assert f.read(100) == content[-10:]
+
+def test_open_remote(served_dir, closed_h5_file):
+    directory, url = served_dir
+    os.replace(closed_h5_file, directory / 'sample.h5')
+    with open_file(directory / 'sample.h5') as f:
+        expected = group_to_str(f, max_depth=3).split('\n', 1)[1]
+    with open_file(url + 'sample.h5') as f:
+        assert f.filename == url + 'sample.h5'
+        assert group_to_str(f, max_depth=3).split('\n', 1)[1] == expected
+        assert f['group1/subgroup2/dataset1'][:].shape == (12,)
@@ -0,0 +1,30 @@
+import h5py
+import numpy as np
+
+from h5glance import sampling
+
+def test_storage_chunks(tmp_path):
+    with h5py.File(tmp_path / 'sample.h5', 'w') as f:
+        ds = f.create_dataset('chunked', (1000, 64), dtype='f4', chunks=(10, 64))
+        assert sampling.storage_chunks(ds) == (10, 64)
+
+        ds = f.create_dataset('contiguous', (1000, 1024), dtype='f8')
+        assert sampling.storage_chunks(ds, target_bytes=8192 * 4) == (4, 1024)
+
+def test_spread_chunk_indices():
+    assert sampling.spread_chunk_indices((100,), 3) == [(0,), (49,), (99,)]
+    assert sampling.spread_chunk_indices((5, 4), 20) == \
+        [(i, j) for i in range(5) for j in range(4)]
+    along0 = sampling.spread_chunk_indices((10, 3), 4, axis=0)
+    assert [ix[0] for ix in along0] == [0, 3, 6, 9]
+
+def test_sampler_bounded_reads(tmp_path):
+    with h5py.File(tmp_path / 'sample.h5', 'w') as f:
+        ds = f.create_dataset('x', data=np.arange(100_000), chunks=(100,))
+        sampler = sampling.ChunkSampler(ds, max_chunks=8)
+        prof = sampler.profile(0, width=60)
+        assert len(prof) == 8
+        assert np.all(np.diff(prof) > 0)
+        counts, edges = sampler.histogram(10)
+        assert counts.sum() == 800
+        assert len(sampler.cache) == 8
@@ -0,0 +1,22 @@
+import h5py
+import numpy as np
+
+from h5glance import selection
+
+def test_parse_slice_expr():
+    assert selection.parse_slice_expr('0, 100:110') == (0, slice(100, 110))
+    assert selection.parse_slice_expr('::2') == (slice(None, None, 2),)
+
+def test_iter_blocks(tmp_path):
+    with h5py.File(tmp_path / 'sample.h5', 'w') as f:
+        ds = f.create_dataset('x', data=np.arange(1000).reshape(250, 4))
+        index = selection.parse_slice_expr('3:200:3, 1:')
+        blocks = list(selection.iter_blocks(ds, index, block_bytes=400,
+                                            first_rows=5))
+        assert blocks[0].shape == (5, 3)
+        assert max(b.shape[0] for b in blocks) == 400 // 32
+        np.testing.assert_array_equal(np.concatenate(blocks), ds[index])
+
+        # Selections not starting with a slice are read in one go
+        [block] = selection.iter_blocks(ds, (5, slice(None)))
+        np.testing.assert_array_equal(block, ds[5])
@@ -0,0 +1,47 @@
+"""Check that the command line tools start quickly
+
+Imports are timed with ``python -X importtime``. Answering --version or
+--help should not load h5py, numpy or htmlgen, which are slow to import,
+especially from network filesystems.
+"""
+import re
+import sys
+from subprocess import run, PIPE
+
+import pytest
+
+SLOW_MODULES = {'h5py', 'numpy', 'htmlgen'}
+
+def import_times(code):
+    """Run code in a new Python process & get {module: self time in μs}"""
+    res = run([sys.executable, '-X', 'importtime', '-c', code],
+              stdout=PIPE, stderr=PIPE, check=True, universal_newlines=True)
+    times = {}
+    for line in res.stderr.splitlines():
+        m = re.match(r'import time:\s+(\d+) \|\s+\d+ \| (\s*)(\S+)', line)
+        if m:
+            times[m[3]] = int(m[1])
+    return times
+
+@pytest.mark.parametrize('entry, args', [
+    ('main', '--version'),
+    ('main', '--help'),
+    ('html_main', '--version'),
+])
+def test_startup_time(entry, args):
+    code = ("from h5glance.cli import {}\n"
+            "try:\n    {}([{!r}])\nexcept SystemExit:\n    pass"
+            ).format(entry, entry, args)
+    times = import_times(code)
+    assert 'h5glance.cli' in times
+    assert not SLOW_MODULES & {m.split('.')[0] for m in times}
+    # Only the command line module of h5glance itself is needed
+    assert {m for m in times if m.split('.')[0] == 'h5glance'} \
+        <= {'h5glance', 'h5glance.cli', 'h5glance.paths'}
+
+def test_lazy_package_attributes():
+    times = import_times("import h5glance; h5glance.H5Glance")
+    assert 'h5glance.ipython' in times
+    assert 'h5py' in times
+    times = import_times("import h5glance")
+    assert 'h5py' not in times
@@ -4,6 +4,8 @@ import re
 import sys
 from subprocess import run, PIPE
 
+import h5py
+import numpy as np
 import pytest
 
 from h5glance import terminal
@@ -114,3 +116,79 @@ def test_cli(closed_h5_file):
     assert 'subgroup1' in stdout
     assert 'synonyms' in stdout
     assert 'scalar' in stdout
+
+def test_sparkline():
+    assert terminal.fmt_sparkline([0, 1, 2, float('nan'), 7]) == '▁▂▃ █'
+    assert terminal.fmt_sparkline([5, 10], lo=0) == '▄█'
+
+def test_dataset_preview(simple_h5_file):
+    sio = io.StringIO()
+    terminal.print_dataset_info(simple_h5_file["/group1/subgroup1/dataset2"], file=sio)
+    out = sio.getvalue()
+    assert 'preview (' in out
+    assert 'histogram:' in out
+
+    sio = io.StringIO()
+    terminal.print_dataset_info(simple_h5_file["/group1/subgroup1/dataset2"],
+                                file=sio, preview=False)
+    assert 'preview' not in sio.getvalue()
+
+@pytest.mark.parametrize('max_chunks', [1, 5, 8])
+def test_preview_max_chunks(tmp_path, max_chunks):
+    with h5py.File(tmp_path / 'chunks.h5', 'w') as f:
+        ds = f.create_dataset('x', data=np.arange(12000.).reshape(200, 60),
+                              chunks=(10, 10))
+        sio = io.StringIO()
+        terminal.print_data_preview(ds, max_chunks=max_chunks, file=sio)
+    nread = int(re.search(r'preview \((\d+) of 120', sio.getvalue())[1])
+    assert 0 < nread <= max_chunks
+
+def test_preview_unreadable_chunk(tmp_path):
+    with h5py.File(tmp_path / 'bad.h5', 'w') as f:
+        ds = f.create_dataset('x', data=np.arange(1000.), chunks=(100,),
+                              compression='gzip')
+        ds.attrs['units'] = 'm'
+        ds.id.write_direct_chunk((500,), b'not gzip data')
+        sio = io.StringIO()
+        terminal.print_dataset_info(ds, file=sio)
+    out = sio.getvalue()
+    assert 'preview unavailable:' in out
+    assert "* units: 'm'" in out
+
+@pytest.mark.parametrize('arr', [
+    np.arange(60).reshape(20, 3) * 1.5,
+    np.array([[-2e10, 1e-9], [3.5, np.nan], [0, 1], [2.5, 3]]),
+    np.arange(24).reshape(4, 3, 2),
+    np.array([1, 2, 3, 1e9, 5, 6.]).reshape(6, 1),  # Mixed magnitudes
+    np.array([1, 2, 3, 1e9, 5, 6.]),
+    np.array([[1, 2], [3, 4], [5, 6], [-70000, 8]]),  # Int width grows later
+    np.array([True, True, True, False, True]),
+    np.array([[True], [True], [True], [False]]),
+    np.arange(100) * 1.25,  # 1D, wrapped over several lines
+    np.arange(1000, 1100),
+    np.array(['a', 'bcd', 'ef', 'g']),
+])
+def test_print_blocks(arr):
+    sio = io.StringIO()
+    blocks = [arr[i:i + 3] for i in range(0, len(arr), 3)]
+    terminal.print_blocks(blocks[0], iter(blocks[1:]), file=sio)
+    assert sio.getvalue() == str(arr) + '\n'
+
+def test_max_children(tmp_path):
+    with h5py.File(tmp_path / 'wide.h5', 'w') as f:
+        for i in range(20):
+            f[f'x{i:02d}'] = i
+        s = terminal.group_to_str(f, max_children=5)
+    lines = s.splitlines()
+    assert len(lines) == 7  # Root, 3 first members, marker, 2 last
+    assert 'x02' in lines[3]
+    assert '… 15 more' in lines[4]
+    assert 'x18' in lines[5] and 'x19' in lines[6]
+
+def test_member_names_creation_order(tmp_path):
+    from h5glance.utils import member_names
+    with h5py.File(tmp_path / 'ordered.h5', 'w', track_order=True) as f:
+        for name in ['c', 'a', 'b', 'd']:
+            f[name] = 0
+        assert member_names(f, 1, 2) == ['a', 'b']
+        assert member_names(f, 3) == ['d']
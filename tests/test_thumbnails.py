@@ -0,0 +1,102 @@
+import h5py
+import numpy as np
+import zlib
+
+from h5glance import html, thumbnails
+
+def make_images_file(path):
+    with h5py.File(path, 'w') as f:
+        f['small'] = np.arange(100 * 120, dtype='f4').reshape(100, 120)
+        f.create_dataset('stack', data=np.ones((5, 256, 256), dtype='u2'),
+                         chunks=(1, 32, 32), compression='gzip')
+        f['line'] = np.zeros(100)
+
+def test_encode_png():
+    img = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    png = thumbnails.encode_png(img)
+    assert png.startswith(b'\x89PNG\r\n\x1a\n')
+    assert png[12:16] == b'IHDR'
+    idat_len = int.from_bytes(png[33:37], 'big')
+    raw = zlib.decompress(png[41:41 + idat_len])
+    assert raw == b''.join(b'\x00' + bytes(row) for row in img.tolist())
+
+def test_thumbnail_array(tmp_path):
+    make_images_file(tmp_path / 'images.h5')
+    with h5py.File(tmp_path / 'images.h5', 'r') as f:
+        assert thumbnails.thumbnail_array(f['small'], size=60).shape == (50, 60)
+        # 4 x 4 chunks, each averaged down to 16 x 16 pixels
+        stack = ReadCounter(f['stack'])
+        arr = thumbnails.thumbnail_array(stack, max_read=16 * 32 * 32 * 2)
+        assert arr.shape == (64, 64)
+        assert len(stack.reads) == 16
+        assert thumbnails.make_thumbnail(f['line']) is None
+
+class ReadCounter:
+    """Wrap a dataset to record what is read from it"""
+    def __init__(self, ds):
+        self.ds = ds
+        self.reads = []
+
+    def __getattr__(self, name):
+        return getattr(self.ds, name)
+
+    def __getitem__(self, index):
+        self.reads.append(index)
+        return self.ds[index]
+
+def test_thumbnail_big_chunks(tmp_path):
+    frame = np.add.outer(np.arange(512.), np.arange(512.))
+    with h5py.File(tmp_path / 'big.h5', 'w') as f:
+        f.create_dataset('f4', data=np.stack([frame] * 3).astype('f4'),
+                         chunks=(1, 512, 512))
+        f.create_dataset('f8', data=np.stack([frame] * 3), chunks=(1, 512, 512))
+
+    with h5py.File(tmp_path / 'big.h5', 'r') as f:
+        # One chunk fits in max_read: read it & average it down
+        ds = ReadCounter(f['f4'])
+        arr = thumbnails.thumbnail_array(ds, max_read=1 << 20)
+        np.testing.assert_allclose(arr, thumbnails._block_mean(frame, 64))
+        assert len(ds.reads) == 1
+
+        # Chunks bigger than max_read: a strided read
+        ds = ReadCounter(f['f8'])
+        arr = thumbnails.thumbnail_array(ds, max_read=1 << 20)
+        np.testing.assert_array_equal(arr, frame[::8, ::8])
+        assert ds.reads == [(1, slice(None, None, 8), slice(None, None, 8))]
+
+def test_thumbnail_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'xdg-cache'))
+    path = tmp_path / 'images.h5'
+    make_images_file(path)
+    cache = thumbnails.ThumbnailCache(tmp_path / 'cache')
+    with h5py.File(path, 'r') as f:
+        thumbs = thumbnails.make_thumbnails(f, cache=cache, jobs=2)
+        assert set(thumbs) == {'/small', '/stack'}
+        key = cache.key(str(path), '/small', thumbnails.THUMBNAIL_SIZE,
+                        thumbnails.MAX_READ_BYTES)
+        assert cache.get(key) == thumbs['/small']
+
+        h = str(html.make_document(f, thumbnails=True))
+        assert h.count('data:image/png;base64,') == 2
+
+def test_thumbnails_shown_only(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'xdg-cache'))
+    path = tmp_path / 'wide.h5'
+    with h5py.File(path, 'w') as f:
+        for i in range(10):
+            f['g/img%d' % i] = np.ones((20, 20))
+        f['g/deeper/img'] = np.ones((20, 20))
+
+    made = []
+    make_thumbnail = thumbnails.make_thumbnail
+    def record(ds, *args):
+        made.append(ds.name)
+        return make_thumbnail(ds, *args)
+    monkeypatch.setattr(thumbnails, 'make_thumbnail', record)
+
+    with h5py.File(path, 'r') as f:
+        h = str(html.make_fragment(f, thumbnails=True, max_depth=2,
+                                   max_children=4))
+    # g shows deeper (not expanded), img0, ..., img8 & img9
+    assert sorted(made) == ['/g/img0', '/g/img8', '/g/img9']
+    assert h.count('data:image/png;base64,') == 3
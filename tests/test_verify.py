@@ -0,0 +1,55 @@
+import h5py
+import numpy as np
+
+from h5glance import pool, verify
+
+def corrupt_chunk(path, dsname, chunk_index):
+    with h5py.File(path, 'r') as f:
+        info = f[dsname].id.get_chunk_info(chunk_index)
+    with open(path, 'r+b') as fh:
+        fh.seek(info.byte_offset + info.size // 2)
+        fh.write(b'\xff' * 16)
+    return info.chunk_offset
+
+def test_verify(tmp_path):
+    path = tmp_path / 'sample.h5'
+    data = np.random.default_rng(0).integers(0, 100, size=(400, 50))
+    with h5py.File(path, 'w') as f:
+        f.create_dataset('compressed', data=data, chunks=(50, 50),
+                         compression='gzip', fletcher32=True)
+        f['contiguous'] = data
+        f['scalar'] = 1.5
+        f.create_dataset('unwritten', shape=(100,), chunks=(10,), dtype='f4')
+        f.create_dataset('strings', data=['a', 'bc', 'def'] * 10, chunks=(4,),
+                         dtype=h5py.string_dtype(), compression='gzip')
+        vlen = f.create_dataset('vlen', shape=(6,), chunks=(2,),
+                                dtype=h5py.vlen_dtype('i4'))
+        vlen[:] = [np.arange(i) for i in range(6)]
+
+    res = verify.verify_file(path, jobs=1, progress=False)
+    assert res.ndatasets == 5
+    assert res.problems == []
+
+    bad_offset = corrupt_chunk(path, 'compressed', 3)
+    bad_str_offset = corrupt_chunk(path, 'strings', 2)
+    res = verify.verify_file(path, jobs=2, progress=False)
+    assert [(p, o) for p, o, _ in res.problems] == [
+        ('/compressed', bad_offset), ('/strings', bad_str_offset)
+    ]
+
+def test_chunk_offsets(tmp_path, monkeypatch):
+    path = tmp_path / 'many.h5'
+    with h5py.File(path, 'w') as f:
+        ds = f.create_dataset('x', data=np.arange(1000), chunks=(10,),
+                              compression='gzip')
+        expected = [ds.id.get_chunk_info(i).chunk_offset for i in range(100)]
+        assert verify.chunk_offsets(ds) == expected
+
+        monkeypatch.setattr(pool, 'TASK_BYTES', 800)
+        tasks = verify.dataset_tasks(ds)
+        assert len(tasks) > 1
+        assert sum((t.offsets for t in tasks), []) == expected
+
+    bad_offset = corrupt_chunk(path, 'x', 57)
+    res = verify.verify_file(path, jobs=1, progress=False)
+    assert [(p, o) for p, o, _ in res.problems] == [('/x', bad_offset)]
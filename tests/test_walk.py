@@ -0,0 +1,80 @@
+import io
+import os
+
+import h5py
+import pytest
+
+from h5glance import terminal, walk
+
+@pytest.fixture(scope='module', autouse=True)
+def no_color():
+    os.environ['H5GLANCE_COLORS'] = '0'
+
+def tree_text(node):
+    sio = io.StringIO()
+    terminal.print_tree(node, file=sio)
+    return sio.getvalue()
+
+def serial_tree(f, **kwargs):
+    max_depth = kwargs.pop('max_depth', float('inf'))
+    tvb = terminal.TreeViewBuilder(**kwargs)
+    return tree_text(tvb.object_node(f, f.filename, max_depth=max_depth))
+
+@pytest.mark.parametrize('split', [1, 100])  # Split at depth 1 or deeper
+@pytest.mark.parametrize('kwargs', [{}, {'max_depth': 2}, {'expand_attrs': True}])
+def test_parallel_tree(closed_h5_file, monkeypatch, split, kwargs):
+    monkeypatch.setattr(walk, 'MIN_TASKS_PER_JOB', split)
+    with h5py.File(closed_h5_file, 'r') as f:
+        expected = serial_tree(f, **kwargs)
+        res = tree_text(walk.parallel_tree(f.filename, f, f.filename, jobs=2,
+                                           **kwargs))
+    assert res == expected
+    if 'max_depth' not in kwargs:
+        # Hard links in different subtrees are resolved across workers
+        assert 'folder\t= /group1/subgroup1' in res
+
+def test_shared_task_group(tmp_path):
+    # Two links to one group at the split depth make one task
+    path = tmp_path / 'shared.h5'
+    with h5py.File(path, 'w') as f:
+        f.create_dataset('a/x', shape=(3,), dtype='f4')
+        f['b'] = f['a']
+        f['c/d'] = f['a']
+    with h5py.File(path, 'r') as f:
+        _, tasks = walk.split_group(f, f.filename, float('inf'), colors=False)
+        assert [t.path for t in tasks] == ['/a', '/c']
+        expected = serial_tree(f)
+        assert tree_text(walk.parallel_tree(path, f, f.filename, jobs=2)) == expected
+    assert 'b\t= /a' in expected
+
+@pytest.mark.parametrize('split', [1, 100])
+def test_links_across_levels(tmp_path, monkeypatch, split):
+    # Hard links between objects which are walked in different rounds of
+    # splitting, or by different workers
+    monkeypatch.setattr(walk, 'MIN_TASKS_PER_JOB', split)
+    path = tmp_path / 'links.h5'
+    with h5py.File(path, 'w') as f:
+        f.create_dataset('z', shape=(2,), dtype='i4')
+        f.create_dataset('c/d/e/v', shape=(2,), dtype='i4')
+        f['a/b/x'] = f['z']
+        f['a/b/y'] = f['c/d']
+        f['a/b/w/loop'] = f['a']
+        f['c/d/e/u'] = f['a/b']
+    with h5py.File(path, 'r') as f:
+        expected = serial_tree(f)
+        assert tree_text(walk.parallel_tree(path, f, f.filename, jobs=2)) == expected
+
+    # With --depth, /a/b/X is shown collapsed first, & /c/X is a link to it,
+    # so Y (only seen inside /c/X by its worker) is shown in full at /c/Y2
+    path = tmp_path / 'depth.h5'
+    with h5py.File(path, 'w') as f:
+        f.create_dataset('a/b/X/Y/v', shape=(2,), dtype='i4')
+        f.create_dataset('a/b/X/Y/w/q', shape=(2,), dtype='i4')
+        f['c/X'] = f['a/b/X']
+        f['c/Y2'] = f['a/b/X/Y']
+        f['c/Y3'] = f['a/b/X/Y']
+    with h5py.File(path, 'r') as f:
+        expected = serial_tree(f, max_depth=3)
+        res = walk.parallel_tree(path, f, f.filename, jobs=2, max_depth=3)
+        assert tree_text(res) == expected
+    assert 'Y3\t= /c/Y2' in expected